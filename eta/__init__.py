@@ -66,6 +66,12 @@ class ETAConfig(EnvConfig):
         self.default_video_ext = self.parse_string(
             d, "default_video_ext", env_var="ETA_DEFAULT_VIDEO_EXT",
             default=".mp4")
+        self.stream_info_cache_path = self.parse_string(
+            d, "stream_info_cache_path", env_var="ETA_STREAM_INFO_CACHE_PATH",
+            default="")
+        self.frame_index_cache_dir = self.parse_string(
+            d, "frame_index_cache_dir", env_var="ETA_FRAME_INDEX_CACHE_DIR",
+            default="")
 
 
 def set_config_settings(**kwargs):
@@ -0,0 +1,602 @@
+'''
+Core tools for benchmarking ETA.
+
+The video benchmarks run on synthetic videos that are generated locally via
+ffmpeg's `testsrc` source, so runs are reproducible on any machine with
+ffmpeg. Each benchmark runs in a fresh process so that its peak memory usage
+can be measured, and the results are written as JSON so that runs can be
+compared via `compare_results()`.
+
+The reader benchmarks also report the number of frame-sized allocations per
+frame. The "read/ffmpeg/copy" benchmark uses a reader that reads each frame
+into a new bytes object and then copies it into a new array, as
+FFmpegVideoReader originally did, so it is the baseline for the
+"read/ffmpeg" and "read/ffmpeg/zero_copy" benchmarks.
+
+Copyright 2017-2018, Voxel51, LLC
+voxel51.com
+
+Brian Moore, brian@voxel51.com
+'''
+# pragma pylint: disable=redefined-builtin
+# pragma pylint: disable=unused-wildcard-import
+# pragma pylint: disable=wildcard-import
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from builtins import *
+# pragma pylint: enable=redefined-builtin
+# pragma pylint: enable=unused-wildcard-import
+# pragma pylint: enable=wildcard-import
+
+from collections import OrderedDict
+import datetime
+import logging
+import multiprocessing
+import os
+import platform
+try:
+    from queue import Empty  # Python 3
+except ImportError:
+    from Queue import Empty  # Python 2
+import resource
+import sys
+import time
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None  # Python 2
+
+import cv2
+import numpy as np
+
+import eta
+import eta.core.serial as etas
+import eta.core.utils as etau
+import eta.core.video as etav
+
+
+logger = logging.getLogger(__name__)
+
+
+# The version of the benchmark results format
+RESULTS_VERSION = 1
+
+# The default frame sizes, GOP sizes, and durations (in seconds) of the
+# synthetic videos on which the video benchmarks are run
+DEFAULT_VIDEO_SIZES = [(320, 240), (1280, 720)]
+DEFAULT_VIDEO_GOP_SIZES = [12, 300]
+DEFAULT_VIDEO_DURATIONS = [10]
+
+# The frame rate of the synthetic videos
+SYNTHETIC_VIDEO_FPS = 30
+
+# The (width, height) to which the sampling benchmarks resize frames, as is
+# typical when sampling clips for a classifier
+SAMPLE_SIZE = (112, 112)
+
+# The number of distinct frames cycled through by the writer benchmarks,
+# which are decoded before the timing starts
+NUM_WRITER_FRAMES = 30
+
+# The number of frames over which the allocations per frame of the reader
+# benchmarks are measured
+NUM_ALLOC_FRAMES = 100
+
+# The interval, in seconds, at which the liveness of a benchmark process is
+# checked while waiting for its result
+_RESULT_POLL_INTERVAL = 1.0
+
+
+class SyntheticVideo(object):
+    '''A synthetic test video generated via ffmpeg's `testsrc` source.'''
+
+    def __init__(self, size, gop_size, duration, fps=SYNTHETIC_VIDEO_FPS):
+        '''Constructs a SyntheticVideo.
+
+        Args:
+            size: the (width, height) of the video
+            gop_size: the number of frames between keyframes
+            duration: the duration of the video, in seconds
+            fps: the frame rate of the video
+        '''
+        self.size = tuple(size)
+        self.gop_size = gop_size
+        self.duration = duration
+        self.fps = fps
+
+    @property
+    def name(self):
+        '''A name like "320x240-gop12-10s" that describes the video.'''
+        return "%dx%d-gop%d-%ds" % (
+            self.size + (self.gop_size, self.duration))
+
+    @property
+    def num_frames(self):
+        '''The number of frames in the video.'''
+        return int(self.fps * self.duration)
+
+    def make(self, path):
+        '''Generates the video at the given path.
+
+        The video is encoded via libx264 with a fixed GOP size, so that the
+        keyframes are regularly spaced.
+        '''
+        ffmpeg = etav.FFmpeg(
+            in_opts=["-f", "lavfi"],
+            out_opts=[
+                "-c:v", "libx264", "-preset", "fast", "-pix_fmt", "yuv420p",
+                "-g", str(self.gop_size), "-keyint_min", str(self.gop_size),
+                "-sc_threshold", "0", "-an",
+            ])
+        ffmpeg.run(
+            "testsrc=size=%dx%d:rate=%d:duration=%d" % (
+                self.size + (self.fps, self.duration)), path)
+
+
+def make_synthetic_videos(
+        sizes=None, gop_sizes=None, durations=None, fps=SYNTHETIC_VIDEO_FPS):
+    '''Makes the list of SyntheticVideos for all combinations of the given
+    frame sizes, GOP sizes, and durations.
+
+    Args:
+        sizes: a list of (width, height) frame sizes. By default,
+            `DEFAULT_VIDEO_SIZES` is used
+        gop_sizes: a list of GOP sizes. By default, `DEFAULT_VIDEO_GOP_SIZES`
+            is used
+        durations: a list of durations, in seconds. By default,
+            `DEFAULT_VIDEO_DURATIONS` is used
+        fps: the frame rate of the videos
+
+    Returns:
+        a list of SyntheticVideos
+    '''
+    return [
+        SyntheticVideo(size, gop_size, duration, fps=fps)
+        for size in sizes or DEFAULT_VIDEO_SIZES
+        for gop_size in gop_sizes or DEFAULT_VIDEO_GOP_SIZES
+        for duration in durations or DEFAULT_VIDEO_DURATIONS
+    ]
+
+
+def run_video_benchmarks(
+        videos=None, benchmarks=None, work_dir=None, repeat=1):
+    '''Runs the video benchmarks on the given synthetic videos.
+
+    Each benchmark is run in a new process, from which the peak resident set
+    sizes of the process and of its ffmpeg subprocesses are recorded. The
+    number of bytes piped to and from ffmpeg is measured by counting the
+    bytes passed through `eta.core.video.FFmpeg`. For the reader benchmarks,
+    the number of frame-sized allocations made per frame read is measured
+    via `tracemalloc` in a separate, untimed pass over the first
+    `NUM_ALLOC_FRAMES` frames. This requires Python 3.9 or later, so it is
+    reported as None otherwise.
+
+    Args:
+        videos: a list of SyntheticVideos. By default,
+            `make_synthetic_videos()` is used
+        benchmarks: an optional list of names of benchmarks from
+            `VIDEO_BENCHMARKS` to run. By default, all benchmarks are run
+        work_dir: an optional directory in which to store the synthetic
+            videos, which are reused if they already exist. By default, a
+            temporary directory is used
+        repeat: the number of times to run each benchmark. The run with the
+            median runtime is reported
+
+    Returns:
+        a dictionary of benchmark results, which can be written as JSON.
+            Benchmarks that failed are reported with an "error" field rather
+            than measurements
+    '''
+    videos = videos or make_synthetic_videos()
+    names = benchmarks or list(VIDEO_BENCHMARKS.keys())
+    for name in names:
+        if name not in VIDEO_BENCHMARKS:
+            raise ValueError(
+                "Unknown video benchmark '%s'; supported values are %s" % (
+                    name, list(VIDEO_BENCHMARKS.keys())))
+
+    if work_dir is None:
+        with etau.TempDir() as tmp_dir:
+            return run_video_benchmarks(
+                videos=videos, benchmarks=names, work_dir=tmp_dir,
+                repeat=repeat)
+
+    results = []
+    for video in videos:
+        video_path = os.path.join(work_dir, video.name + ".mp4")
+        if not os.path.isfile(video_path):
+            logger.info("Generating synthetic video '%s'", video_path)
+            video.make(video_path)
+
+        for name in names:
+            logger.info("Running benchmark '%s' on '%s'", name, video.name)
+            result = OrderedDict([
+                ("benchmark", name),
+                ("video", video.name),
+            ])
+            try:
+                runs = [
+                    _run_in_new_process(name, video_path, work_dir)
+                    for _ in range(repeat)]
+                runs.sort(key=lambda r: r["seconds"])
+                result.update(runs[len(runs) // 2])
+            except BenchmarkError as e:
+                logger.warning(str(e))
+                result["error"] = str(e)
+            results.append(result)
+
+    return OrderedDict([
+        ("version", RESULTS_VERSION),
+        ("suite", "video"),
+        ("environment", get_environment_info()),
+        ("results", results),
+    ])
+
+
+def get_environment_info():
+    '''Returns a dictionary describing the environment in which the
+    benchmarks are run.
+    '''
+    try:
+        ffmpeg_version = etau.communicate_or_die(
+            ["ffmpeg", "-version"], decode=True).splitlines()[0]
+    except Exception:
+        ffmpeg_version = None
+
+    return OrderedDict([
+        ("timestamp", datetime.datetime.now().isoformat()),
+        ("eta_version", eta.version),
+        ("python_version", platform.python_version()),
+        ("platform", platform.platform()),
+        ("cpu_count", multiprocessing.cpu_count()),
+        ("opencv_version", cv2.__version__),
+        ("numpy_version", np.__version__),
+        ("ffmpeg_version", ffmpeg_version),
+    ])
+
+
+def compare_results(old_results, new_results):
+    '''Compares two sets of benchmark results.
+
+    Args:
+        old_results: a dictionary of baseline results, as returned by
+            `run_video_benchmarks()`
+        new_results: a dictionary of new results
+
+    Returns:
+        a list of (benchmark, video, old fps, new fps, speedup) tuples for
+            the benchmarks that appear in both sets of results
+    '''
+    old = {
+        (r["benchmark"], r["video"]): r for r in old_results["results"]
+        if "error" not in r}
+    rows = []
+    for r in new_results["results"]:
+        key = (r["benchmark"], r["video"])
+        if key not in old or "error" in r:
+            continue
+        old_fps = old[key]["fps"]
+        speedup = r["fps"] / old_fps if old_fps else float("nan")
+        rows.append(key + (old_fps, r["fps"], speedup))
+
+    return rows
+
+
+def render_results_str(results):
+    '''Renders a table of the given benchmark results.'''
+    lines = ["%-24s %-22s %10s %12s %10s %10s %13s" % (
+        "benchmark", "video", "fps", "MB piped", "RSS MB", "ffmpeg MB",
+        "allocs/frame")]
+    for r in results["results"]:
+        if "error" in r:
+            lines.append("%-24s %-22s %10s" % (
+                r["benchmark"], r["video"], "failed"))
+            continue
+        allocs = r.get("allocs_per_frame", None)
+        lines.append("%-24s %-22s %10.1f %12.1f %10.1f %10.1f %13s" % (
+            r["benchmark"], r["video"], r["fps"], r["bytes_piped"] / 1e6,
+            r["peak_rss"] / 1e6, r["peak_ffmpeg_rss"] / 1e6,
+            "%.2f" % allocs if allocs is not None else "n/a"))
+    return "\n".join(lines)
+
+
+def render_comparison_str(rows):
+    '''Renders a table of the comparison returned by `compare_results()`.'''
+    lines = ["%-24s %-22s %10s %10s %8s" % (
+        "benchmark", "video", "old fps", "new fps", "speedup")]
+    for benchmark, video, old_fps, new_fps, speedup in rows:
+        lines.append("%-24s %-22s %10.1f %10.1f %7.2fx" % (
+            benchmark, video, old_fps, new_fps, speedup))
+    return "\n".join(lines)
+
+
+def write_results(results, path):
+    '''Writes the benchmark results to a JSON file.'''
+    etas.write_json(results, path)
+
+
+def read_results(path):
+    '''Reads benchmark results from a JSON file.'''
+    return etas.read_json(path)
+
+
+def _run_in_new_process(name, video_path, work_dir):
+    queue = multiprocessing.Queue()
+    p = multiprocessing.Process(
+        target=_run_benchmark, args=(queue, name, video_path, work_dir))
+    p.start()
+    try:
+        result, error = _get_result(queue, p)
+    finally:
+        p.join()
+    if error is not None:
+        raise BenchmarkError(
+            "Benchmark '%s' failed on '%s': %s" % (name, video_path, error))
+    return result
+
+
+def _get_result(queue, p):
+    # Waits for the benchmark process to report its result, failing if the
+    # process dies without doing so, e.g., due to a segfault or the OOM killer
+    while True:
+        try:
+            return queue.get(timeout=_RESULT_POLL_INTERVAL)
+        except Empty:
+            pass
+
+        if not p.is_alive():
+            try:
+                # The result may have been put just before the process exited
+                return queue.get(timeout=_RESULT_POLL_INTERVAL)
+            except Empty:
+                return None, "Process exited with code %s" % p.exitcode
+
+
+def _run_benchmark(queue, name, video_path, work_dir):
+    try:
+        counter = _PipedBytesCounter()
+        with counter:
+            num_frames, seconds = VIDEO_BENCHMARKS[name](video_path, work_dir)
+
+        result = OrderedDict([
+            ("frames", num_frames),
+            ("seconds", seconds),
+            ("fps", num_frames / seconds if seconds > 0 else float("inf")),
+            ("bytes_piped", counter.num_bytes),
+            ("peak_rss", _get_peak_rss(resource.RUSAGE_SELF)),
+            ("peak_ffmpeg_rss", _get_peak_rss(resource.RUSAGE_CHILDREN)),
+        ])
+        if name in VIDEO_READERS:
+            result["allocs_per_frame"] = _measure_allocs_per_frame(
+                lambda: VIDEO_READERS[name](video_path))
+        queue.put((result, None))
+    except Exception as e:
+        queue.put((None, "%s: %s" % (type(e).__name__, e)))
+
+
+def _measure_allocs_per_frame(make_reader):
+    # Returns the average number of frame-sized allocations made while reading
+    # each of the first `NUM_ALLOC_FRAMES` frames of the given reader, or None
+    # if `tracemalloc.reset_peak()` is unavailable (Python < 3.9)
+    if tracemalloc is None or not hasattr(tracemalloc, "reset_peak"):
+        return None
+
+    allocs = 0.0
+    count = 0
+    tracemalloc.start()
+    try:
+        with make_reader() as r:
+            while count < NUM_ALLOC_FRAMES:
+                curr = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                try:
+                    img = r.read()
+                except StopIteration:
+                    break
+
+                # The peak memory allocated while reading the frame, beyond
+                # what was already held
+                peak = tracemalloc.get_traced_memory()[1]
+                allocs += (peak - curr) / img.nbytes
+                count += 1
+    finally:
+        tracemalloc.stop()
+
+    return allocs / max(count, 1)
+
+
+def _get_peak_rss(who):
+    # Returns the peak resident set size, in bytes
+    maxrss = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":
+        return maxrss  # bytes
+    return maxrss * 1024  # kilobytes
+
+
+class _PipedBytesCounter(object):
+    '''Context manager that counts the bytes piped to and from ffmpeg via
+    `eta.core.video.FFmpeg`.
+
+    This instruments the FFmpeg class itself, so it must only be used in a
+    process dedicated to benchmarking.
+    '''
+
+    def __init__(self):
+        self.num_bytes = 0
+        self._methods = {}
+
+    def __enter__(self):
+        for method_name in ("read", "read_into", "stream"):
+            method = getattr(etav.FFmpeg, method_name)
+            self._methods[method_name] = method
+            setattr(etav.FFmpeg, method_name, self._wrap(method_name, method))
+        return self
+
+    def __exit__(self, *args):
+        for method_name, method in self._methods.items():
+            setattr(etav.FFmpeg, method_name, method)
+
+    def _wrap(self, method_name, method):
+        def wrapper(ffmpeg, arg):
+            out = method(ffmpeg, arg)
+            if method_name == "read":
+                self.num_bytes += len(out)
+            elif method_name == "read_into":
+                self.num_bytes += out
+            else:
+                self.num_bytes += memoryview(arg).nbytes
+            return out
+
+        return wrapper
+
+
+class BenchmarkError(Exception):
+    '''Exception raised when a benchmark fails.'''
+    pass
+
+
+class _CopyingFFmpegVideoReader(etav.FFmpegVideoReader):
+    '''FFmpegVideoReader that reads each frame into a new bytes object and
+    then copies it into a new array, rather than reading it directly into an
+    array, as FFmpegVideoReader originally did.
+    '''
+
+    def _grab(self, buf):
+        raw = self._ffmpeg.read(buf.nbytes)
+        if len(raw) != buf.nbytes:
+            raise etav.VideoReaderError(
+                "Failed to grab frame %d" % (self._stream_frame + 1))
+        buf.reshape(-1)[:] = np.frombuffer(raw, dtype=np.uint8)
+        self._stream_frame += 1
+
+
+# Each benchmark takes the path to an input video and a working directory,
+# and returns the number of frames processed and the runtime in seconds
+
+
+def _read_ffmpeg(video_path, work_dir):
+    return _read(VIDEO_READERS["read/ffmpeg"](video_path))
+
+
+def _read_ffmpeg_zero_copy(video_path, work_dir):
+    return _read(VIDEO_READERS["read/ffmpeg/zero_copy"](video_path))
+
+
+def _read_ffmpeg_copy(video_path, work_dir):
+    return _read(VIDEO_READERS["read/ffmpeg/copy"](video_path))
+
+
+def _read_opencv(video_path, work_dir):
+    return _read(VIDEO_READERS["read/opencv"](video_path))
+
+
+def _read(reader):
+    start = time.time()
+    with reader as r:
+        num_frames = sum(1 for _ in r)
+    return num_frames, time.time() - start
+
+
+def _write_ffmpeg(video_path, work_dir):
+    return _write(video_path, lambda outpath, fps, size: (
+        etav.FFmpegVideoWriter(outpath, fps, size)), work_dir)
+
+
+def _write_opencv(video_path, work_dir):
+    return _write(video_path, lambda outpath, fps, size: (
+        etav.OpenCVVideoWriter(outpath, fps, size)), work_dir)
+
+
+def _write(video_path, make_writer, work_dir):
+    with etav.FFmpegVideoReader(video_path) as r:
+        num_frames = r.total_frame_count
+        imgs, _ = r.read_batch(NUM_WRITER_FRAMES)
+        fps = r.frame_rate
+        size = r.frame_size
+
+    outpath = os.path.join(work_dir, "write-%d.mp4" % os.getpid())
+    start = time.time()
+    with make_writer(outpath, fps, size) as w:
+        for idx in range(num_frames):
+            w.write(imgs[idx % len(imgs)])
+    seconds = time.time() - start
+
+    etau.delete_file(outpath)
+    return num_frames, seconds
+
+
+def _processor_roundtrip(video_path, work_dir):
+    outpath = os.path.join(work_dir, "roundtrip-%d.mp4" % os.getpid())
+    start = time.time()
+    num_frames = 0
+    with etav.VideoProcessor(video_path, out_video_path=outpath) as p:
+        for img in p:
+            p.write(img)
+            num_frames += 1
+    seconds = time.time() - start
+
+    etau.delete_file(outpath)
+    return num_frames, seconds
+
+
+def _sample_first(video_path, work_dir):
+    start = time.time()
+    imgs = etav.sample_first_frames(video_path, 32, size=SAMPLE_SIZE)
+    return len(imgs), time.time() - start
+
+
+def _sample_uniform_sparse(video_path, work_dir):
+    start = time.time()
+    imgs = etav.uniformly_sample_frames(video_path, 8, size=SAMPLE_SIZE)
+    return len(imgs), time.time() - start
+
+
+def _sample_uniform_dense(video_path, work_dir):
+    k = etav.get_frame_count(video_path) // 2
+    start = time.time()
+    imgs = etav.uniformly_sample_frames(video_path, k, size=SAMPLE_SIZE)
+    return len(imgs), time.time() - start
+
+
+def _sample_sliding_sparse(video_path, work_dir):
+    stride = etav.get_frame_count(video_path) // 4
+    start = time.time()
+    clips = etav.sliding_window_sample_frames(
+        video_path, 8, stride, size=SAMPLE_SIZE)
+    return clips.shape[0] * clips.shape[1], time.time() - start
+
+
+def _sample_sliding_dense(video_path, work_dir):
+    start = time.time()
+    clips = etav.sliding_window_sample_frames(
+        video_path, 16, 4, size=SAMPLE_SIZE)
+    return clips.shape[0] * clips.shape[1], time.time() - start
+
+
+# The readers used by the reader benchmarks, which are functions that
+# construct a reader for the given video path
+VIDEO_READERS = OrderedDict([
+    ("read/ffmpeg", lambda path: etav.FFmpegVideoReader(path)),
+    ("read/ffmpeg/zero_copy", lambda path: etav.FFmpegVideoReader(
+        path, zero_copy=True)),
+    ("read/ffmpeg/copy", lambda path: _CopyingFFmpegVideoReader(path)),
+    ("read/opencv", lambda path: etav.OpenCVVideoReader(path)),
+])
+
+# The available video benchmarks
+VIDEO_BENCHMARKS = OrderedDict([
+    ("read/ffmpeg", _read_ffmpeg),
+    ("read/ffmpeg/zero_copy", _read_ffmpeg_zero_copy),
+    ("read/ffmpeg/copy", _read_ffmpeg_copy),
+    ("read/opencv", _read_opencv),
+    ("write/ffmpeg", _write_ffmpeg),
+    ("write/opencv", _write_opencv),
+    ("processor/roundtrip", _processor_roundtrip),
+    ("sample/first", _sample_first),
+    ("sample/uniform/sparse", _sample_uniform_sparse),
+    ("sample/uniform/dense", _sample_uniform_dense),
+    ("sample/sliding/sparse", _sample_sliding_sparse),
+    ("sample/sliding/dense", _sample_sliding_dense),
+])
@@ -244,8 +244,21 @@ class C3DFeaturizerConfig(C3DConfig):
     Attributes:
         model: the C3D UCF101 model to use
         sample_method: the frame sampling method to use. The possible values
-            are "first", "uniform", and "sliding_window"
+            are "first", "uniform", "sliding_window", "scene", and
+            "keyframes". The latter two featurize the clips that start at
+            the frames chosen by `eta.core.video.adaptively_sample_frames()`
         stride: the stride to use when the sampling method is "sliding_window"
+        clip_batch_size: an optional number of clips to featurize at a time
+            when the sampling method is "sliding_window". If provided, the
+            clips are streamed from the video in batches of this size, so
+            memory usage does not grow with the length of the video. By
+            default, all clips are sampled at once
+        scene_threshold: the scene change score above which clips are sampled
+            when the sampling method is "scene"
+        min_spacing: an optional minimum number of frames between the starts
+            of adaptively sampled clips
+        max_spacing: an optional maximum number of frames between the starts
+            of adaptively sampled clips
     '''
 
     def __init__(self, d):
@@ -253,6 +266,12 @@ class C3DFeaturizerConfig(C3DConfig):
         self.sample_method = self.parse_string(
             d, "sample_method", default="sliding_window")
         self.stride = self.parse_number(d, "stride", default=8)
+        self.clip_batch_size = self.parse_number(
+            d, "clip_batch_size", default=None)
+        self.scene_threshold = self.parse_number(
+            d, "scene_threshold", default=0.3)
+        self.min_spacing = self.parse_number(d, "min_spacing", default=None)
+        self.max_spacing = self.parse_number(d, "max_spacing", default=None)
 
 
 class C3DFeaturizer(Featurizer):
@@ -289,12 +308,22 @@ class C3DFeaturizer(Featurizer):
 
         Returns:
             the feature vector, a 1D array of length 4096
-        '''
-        clips = self._sample_clips(video_path)
 
-        features = self.c3d.evaluate(clips, layer=self.c3d.fc2l)
-        if self.config.sample_method == "sliding_window":
-            # Average over sliding window clips
+        Raises:
+            ValueError: if the video is too short to contain a clip
+        '''
+        features = [
+            self.c3d.evaluate(clips, layer=self.c3d.fc2l)
+            for clips in self._sample_clips(video_path)]
+        if not features:
+            # Videos that are shorter than one clip yield no batches
+            raise ValueError(
+                "Video '%s' is shorter than one clip (16 frames)" % video_path)
+
+        features = np.concatenate(features)
+        if self.config.sample_method in (
+                "sliding_window", "scene", "keyframes"):
+            # Average over the clips
             features = np.mean(features, axis=0)
             features /= np.linalg.norm(features)
         else:
@@ -303,18 +332,58 @@ class C3DFeaturizer(Featurizer):
         return features
 
     def _sample_clips(self, video_path):
+        # Returns an iterable of batches of clips to featurize, which is empty
+        # if the video is shorter than one clip
         sample_method = self.config.sample_method
         stride = self.config.stride
+        clip_batch_size = self.config.clip_batch_size
         size = (112, 112)
 
         if sample_method == "first":
             clips = [etav.sample_first_frames(video_path, 16, size=size)]
         elif sample_method == "uniform":
             clips = [etav.uniformly_sample_frames(video_path, 16, size=size)]
+        elif sample_method == "sliding_window" and clip_batch_size:
+            return etav.iter_sliding_window_clips(
+                video_path, 16, int(stride), size=size,
+                batch_size=int(clip_batch_size))
         elif sample_method == "sliding_window":
             clips = etav.sliding_window_sample_frames(
                 video_path, 16, stride, size=size)
+            if not clips.size:
+                return []
+        elif sample_method in ("scene", "keyframes"):
+            return self._sample_adaptive_clips(video_path, size)
         else:
             raise ValueError("Invalid sample_method '%s'" % sample_method)
 
-        return clips
+        return [clips]
+
+    def _sample_adaptive_clips(self, video_path, size):
+        # Returns a list containing the batch of adaptively sampled clips,
+        # which is empty if the video is shorter than one clip, as with
+        # sliding windows
+        num_frames = etav.get_frame_count(video_path)
+        if num_frames < 16:
+            return []
+
+        frames = etav.adaptively_sample_frames(
+            video_path, method=self.config.sample_method,
+            scene_threshold=self.config.scene_threshold,
+            min_spacing=self.config.min_spacing,
+            max_spacing=self.config.max_spacing)
+
+        # Clips that would extend past the end of the video are shifted back
+        starts = sorted(set(
+            max(1, min(fn, num_frames - 15)) for fn in frames.to_list()))
+        clip_frames = sorted(set(
+            start + idx for start in starts for idx in range(16)))
+
+        imgs = {}
+        with etav.FFmpegVideoReader(
+                video_path, frames=clip_frames, size=size) as vr:
+            for img in vr:
+                imgs[vr.frame_number] = img
+
+        return [np.array([
+            [imgs[start + idx] for idx in range(16)] for start in starts])]
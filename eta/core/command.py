@@ -424,6 +424,80 @@ class PipelinesCommand(Command):
             metadata.render("./" + args.diagram + ".svg")
 
 
+class BenchmarkCommand(Command):
+    '''Command-line tool for benchmarking ETA.
+
+    Examples:
+        # Run the video benchmarks and write the results to a JSON file
+        eta benchmark video -o '/path/to/results.json'
+
+        # Run specific benchmarks on custom synthetic videos
+        eta benchmark video \\
+            -b read/ffmpeg read/opencv \\
+            --sizes 640x480 1920x1080 --gop-sizes 30 --durations 5
+
+        # Compare the results of a run to a baseline run
+        eta benchmark video -o new.json --compare '/path/to/old.json'
+    '''
+
+    @staticmethod
+    def setup(parser):
+        parser.add_argument(
+            "suite", choices=["video"], help="the benchmark suite to run")
+        parser.add_argument(
+            "-o", "--output", help="path to write the JSON results")
+        parser.add_argument(
+            "-b", "--benchmarks", nargs="+", metavar="NAME",
+            help="the names of the benchmarks to run, like 'read/ffmpeg'. "
+            "By default, all benchmarks are run")
+        parser.add_argument(
+            "--sizes", nargs="+", metavar="WxH",
+            help="the frame sizes of the synthetic videos")
+        parser.add_argument(
+            "--gop-sizes", nargs="+", type=int, metavar="N",
+            help="the GOP sizes of the synthetic videos")
+        parser.add_argument(
+            "--durations", nargs="+", type=int, metavar="SECONDS",
+            help="the durations of the synthetic videos")
+        parser.add_argument(
+            "--work-dir",
+            help="a directory in which to store and reuse the synthetic "
+            "videos")
+        parser.add_argument(
+            "-r", "--repeat", type=int, default=1,
+            help="the number of times to run each benchmark")
+        parser.add_argument(
+            "-c", "--compare",
+            help="path to the JSON results of a baseline run to compare to")
+
+    @staticmethod
+    def run(args):
+        # The benchmarking tools import heavy dependencies, so they are only
+        # imported when needed
+        import eta.core.benchmark as etabe
+
+        sizes = None
+        if args.sizes:
+            sizes = [
+                tuple(int(d) for d in size.split("x")) for size in args.sizes]
+
+        videos = etabe.make_synthetic_videos(
+            sizes=sizes, gop_sizes=args.gop_sizes, durations=args.durations)
+        results = etabe.run_video_benchmarks(
+            videos=videos, benchmarks=args.benchmarks,
+            work_dir=args.work_dir, repeat=args.repeat)
+        logger.info(etabe.render_results_str(results))
+
+        if args.output:
+            etabe.write_results(results, args.output)
+            logger.info("Results written to '%s'", args.output)
+
+        if args.compare:
+            baseline = etabe.read_results(args.compare)
+            rows = etabe.compare_results(baseline, results)
+            logger.info(etabe.render_comparison_str(rows))
+
+
 def _render_names_in_dirs_str(d):
     chunks = []
     mdict = _group_by_dir(d)
@@ -464,6 +538,7 @@ _register_command("clean", CleanCommand)
 _register_command("models", ModelsCommand)
 _register_command("modules", ModulesCommand)
 _register_command("pipelines", PipelinesCommand)
+_register_command("benchmark", BenchmarkCommand)
 
 
 def main():
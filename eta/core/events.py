@@ -77,7 +77,18 @@ class EventSeries(Serializable):
 
 
 class EventDetection(Serializable):
-    '''A per-frame binary event detection.'''
+    '''A per-frame binary event detection.
+
+    The detections are stored in a numpy bool array and are serialized as
+    run-length encoded (first, last) intervals of the frames in which the event
+    is detected, which is compact for long videos. The legacy serialization,
+    a dictionary mapping each frame number to its detection, can still be
+    read.
+    '''
+
+    # The version of the serialized format. Version 1 is the legacy per-frame
+    # dictionary, which has no version marker
+    VERSION = 2
 
     def __init__(self, bools=None):
         '''Constructs an EventDetection instance from a list of per-frame
@@ -90,39 +101,123 @@ class EventDetection(Serializable):
         '''
         if bools is None:
             bools = []
-        self.bools = [bool(b) for b in list(bools)]
+        if isinstance(bools, np.ndarray):
+            bools = bools.astype(bool).ravel()
+        else:
+            bools = np.fromiter((bool(b) for b in bools), dtype=bool)
+
+        self._bools = bools
+        self._num_frames = len(bools)
+
+    def __len__(self):
+        return self._num_frames
+
+    @property
+    def bools(self):
+        '''A list of the per-frame detections.'''
+        return self._bools[:self._num_frames].tolist()
 
     def add(self, b):
         '''Adds a detection to the series.'''
-        self.bools.append(bool(b))
+        if self._num_frames == len(self._bools):
+            # Grow geometrically so that adding is amortized O(1)
+            bools = np.zeros(max(2 * self._num_frames, 64), dtype=bool)
+            bools[:self._num_frames] = self._bools
+            self._bools = bools
+
+        self._bools[self._num_frames] = bool(b)
+        self._num_frames += 1
+
+    def to_intervals(self):
+        '''Returns the (firsts, lasts) arrays of the intervals of frames,
+        inclusive, in which the event is detected. Frames are 1-based.
+        '''
+        bools = self._bools[:self._num_frames]
+        edges = np.diff(np.concatenate(([0], bools, [0])).astype(np.int8))
+        firsts = np.flatnonzero(edges == 1) + 1
+        lasts = np.flatnonzero(edges == -1)
+        return firsts, lasts
 
     def serialize(self):
         '''Serializes the EventDetection into a dictionary.'''
-        return collections.OrderedDict(
-            ("%d" % idx, b) for idx, b in enumerate(self.bools, 1)
-        )
+        firsts, lasts = self.to_intervals()
+        return collections.OrderedDict([
+            ("version", self.VERSION),
+            ("num_frames", self._num_frames),
+            ("intervals", np.stack((firsts, lasts), axis=1).tolist()),
+        ])
 
     def to_series(self):
         '''Converts the EventDetection into an EventSeries.'''
-        events = EventSeries()
-        start = None
-        in_event = False
-        for idx, b in enumerate(self.bools, 1):
-            if in_event:
-                if not b:
-                    events.add(Event(start, idx - 1))
-                    in_event = False
-            elif b:
-                start = idx
-                in_event = True
-        if in_event:
-            events.add(Event(start, len(self.bools)))
-        return events
+        firsts, lasts = self.to_intervals()
+        return EventSeries(events=[
+            Event(first, last)
+            for first, last in zip(firsts.tolist(), lasts.tolist())])
+
+    @classmethod
+    def from_intervals(cls, firsts, lasts, num_frames):
+        '''Constructs an EventDetection from the intervals of frames,
+        inclusive, in which the event is detected.
+
+        Args:
+            firsts: an array-like of the first frame of each interval
+            lasts: an array-like of the last frame of each interval
+            num_frames: the total number of frames
+
+        Raises:
+            EventDetectionError: if an interval lies outside of the frames
+        '''
+        firsts = np.asarray(firsts, dtype=np.int64).ravel()
+        lasts = np.asarray(lasts, dtype=np.int64).ravel()
+        if firsts.size and (
+                firsts.min() < 1 or lasts.max() > num_frames or
+                np.any(lasts < firsts)):
+            raise EventDetectionError(
+                "Invalid intervals for an EventDetection with %d frames" %
+                num_frames)
+
+        # Mark the start and end of each interval and integrate
+        deltas = np.zeros(num_frames + 1, dtype=np.int64)
+        np.add.at(deltas, firsts - 1, 1)
+        np.add.at(deltas, lasts, -1)
+        return cls(bools=np.cumsum(deltas[:-1]) > 0)
 
     @classmethod
     def from_dict(cls, d):
-        '''Constructs a EventDetection from a JSON dictionary.'''
-        return cls(bools=[bool(d[k]) for k in sorted(d.keys(), key=int)])
+        '''Constructs a EventDetection from a JSON dictionary.
+
+        Both the run-length encoded format and the legacy per-frame format are
+        supported.
+
+        Raises:
+            EventDetectionError: if the dictionary has an unsupported version
+        '''
+        if "version" not in d:
+            return cls._from_legacy_dict(d)
+
+        if d["version"] != cls.VERSION:
+            raise EventDetectionError(
+                "Unsupported EventDetection version %s" % d["version"])
+
+        intervals = np.asarray(d["intervals"], dtype=np.int64).reshape(-1, 2)
+        return cls.from_intervals(
+            intervals[:, 0], intervals[:, 1], d["num_frames"])
+
+    @classmethod
+    def _from_legacy_dict(cls, d):
+        # Places each detection at its frame rather than sorting the keys
+        frames = np.fromiter(
+            (int(k) for k in d), dtype=np.int64, count=len(d))
+        vals = np.fromiter(
+            (bool(v) for v in d.values()), dtype=bool, count=len(d))
+        bools = np.zeros(frames.max() if frames.size else 0, dtype=bool)
+        bools[frames - 1] = vals
+        return cls(bools=bools)
+
+
+class EventDetectionError(Exception):
+    '''Exception raised when an invalid EventDetection is encountered.'''
+    pass
 
 
 class FilterConfig(Config):
@@ -382,6 +382,9 @@ class VideoFramesFeaturizerConfig(Config):
         self.frame_featurizer = self.parse_object(
             d, "frame_featurizer", FeaturizerConfig)
         self.frames = self.parse_string(d, "frames", default="*")
+        self.frame_size = self.parse_array(d, "frame_size", default=None)
+        self.reuse_threshold = self.parse_number(
+            d, "reuse_threshold", default=None)
 
 
 class VideoFramesFeaturizer(Featurizer):
@@ -398,6 +401,22 @@ class VideoFramesFeaturizer(Featurizer):
     that preprocesses each input frame before featurizing it. By default, no
     preprocessing is performed.
 
+    If the `frame_size` attribute is provided, the frames are resized to the
+    given (width, height) while they are decoded, before any preprocessing.
+
+    If the `reuse_threshold` attribute is provided, a cheap motion gate is
+    applied before featurizing each frame: the frame and the last featurized
+    frame are downsampled to grayscale `GATE_SIZE` thumbnails, and if their
+    mean absolute difference (in [0, 255]) is below the threshold, the feature
+    of the last featurized frame is reused rather than computed. This avoids
+    running the frame featurizer on the near-identical frames of static
+    scenes or of videos whose frames were duplicated when upsampling their
+    frame rates. Reused features are written to the backing store like any
+    other feature, along with the number of the frame whose feature was
+    reused. The `num_featurized_frames` and `num_reused_frames` attributes
+    count the frames of the last call to `featurize()` that were featurized
+    and reused, respectively.
+
     **WARNING** if you use the same backing path for multiple videos your
     features will be invalid (features on disk are not overwritten, they are
     simply skipped).
@@ -425,6 +444,9 @@ class VideoFramesFeaturizer(Featurizer):
     @todo: Generalize to allow non npz-able features
     '''
 
+    # The (width, height) of the thumbnails compared by the motion gate
+    GATE_SIZE = (32, 32)
+
     def __init__(self, config):
         '''Creates a new VideoFramesFeaturizer and initializes the backing
         storage.
@@ -435,6 +457,8 @@ class VideoFramesFeaturizer(Featurizer):
         self.validate(config)
         self.config = config
         self.most_recent_frame = -1
+        self.num_featurized_frames = 0
+        self.num_reused_frames = 0
 
         super(VideoFramesFeaturizer, self).__init__()
 
@@ -523,20 +547,27 @@ class VideoFramesFeaturizer(Featurizer):
         No checking is explicitly done here. Careful about starting from
         0 or 1.
         '''
+        return self._load_featurized_frame(frame_number)[0]
+
+    def _load_featurized_frame(self, frame_number):
+        # Returns the feature of the given frame and whether it was reused
+        # from another frame by the motion gate
         p = self.featurized_frame_path(frame_number)
         if not os.path.isfile(p):
             raise FeaturizedFrameNotFoundError("Feature %d not found", p)
 
-        return np.load(p)["v"]
+        with np.load(p) as npz:
+            return npz["v"], "reused_from" in npz
 
     def featurize(self, video_path, frames=None, returnX=True):
         '''Featurizes the frames of the input video.
 
         Attributes:
             video_path: the input video path
-            frames: an optional frames string to specify the frames of the
-                video to featurize. By default, the value provided in the
-                VideoFramesFeaturizerConfig is used
+            frames: an optional frames string or FrameRanges instance, such
+                as one returned by `eta.core.video.adaptively_sample_frames()`,
+                specifying the frames of the video to featurize. By default,
+                the value provided in the VideoFramesFeaturizerConfig is used
             returnX: whether to return the frames matrix
 
         Returns:
@@ -563,31 +594,48 @@ class VideoFramesFeaturizer(Featurizer):
         if returnX:
             X = None
 
-        with etav.FFmpegVideoReader(video_path, frames=frames) as vr:
+        # The motion gate compares each frame to the last featurized frame
+        reuse_threshold = self.config.reuse_threshold
+        gate_thumb = None
+        gate_frame = None
+        gate_v = None
+        self.num_featurized_frames = 0
+        self.num_reused_frames = 0
+
+        size = self.config.frame_size
+        with etav.FFmpegVideoReader(
+                video_path, frames=frames, size=size) as vr:
             for img in vr:
                 self.most_recent_frame = vr.frame_number
                 path = self.featurized_frame_path(vr.frame_number)
+                thumb = None
+                if reuse_threshold is not None:
+                    thumb = _make_gate_thumbnail(img, self.GATE_SIZE)
 
                 try:
                     # Try to load the existing feature
-                    v = self.retrieve_featurized_frame(vr.frame_number)
+                    v, reused = self._load_featurized_frame(vr.frame_number)
+                    if not reused:
+                        # Only computed features become the gate reference,
+                        # so that reuse never chains across frames
+                        gate_thumb, gate_frame, gate_v = (
+                            thumb, vr.frame_number, v)
                 except FeaturizedFrameNotFoundError:
-                    # Build the per-frame Featurizer, if necessary
-                    if not self._frame_featurizer:
-                        self._frame_featurizer = \
-                            self.config.frame_featurizer.build()
-                        self._frame_featurizer.start()
-
-                    if self._frame_preprocessor is not None:
-                        # Pre-process and then featurize the frame
-                        _img = self._frame_preprocessor(img)
-                        v = self._frame_featurizer.featurize(_img)
+                    # Thumbnails are only made when the gate is enabled
+                    if gate_thumb is not None and np.mean(
+                            np.abs(thumb - gate_thumb)) < reuse_threshold:
+                        # Reuse the feature of the last featurized frame
+                        v = gate_v
+                        np.savez_compressed(path, v=v, reused_from=gate_frame)
+                        self.num_reused_frames += 1
                     else:
-                        # Featurize the frame
-                        v = self._frame_featurizer.featurize(img)
+                        v = self._featurize_frame(img)
 
-                    # Write the feature to disk
-                    np.savez_compressed(path, v=v)
+                        # Write the feature to disk
+                        np.savez_compressed(path, v=v)
+                        self.num_featurized_frames += 1
+                        gate_thumb, gate_frame, gate_v = (
+                            thumb, vr.frame_number, v)
 
                 if returnX:
                     if X is None:
@@ -601,8 +649,25 @@ class VideoFramesFeaturizer(Featurizer):
             self._frame_featurizer.stop()
             self._frame_featurizer = None
 
+        if reuse_threshold is not None:
+            logger.debug(
+                "Featurized %d frames and reused the features of %d frames",
+                self.num_featurized_frames, self.num_reused_frames)
+
         return X.finalize() if returnX else None
 
+    def _featurize_frame(self, img):
+        # Build the per-frame Featurizer, if necessary
+        if not self._frame_featurizer:
+            self._frame_featurizer = self.config.frame_featurizer.build()
+            self._frame_featurizer.start()
+
+        if self._frame_preprocessor is not None:
+            # Pre-process and then featurize the frame
+            img = self._frame_preprocessor(img)
+
+        return self._frame_featurizer.featurize(img)
+
     def featurized_frame_path(self, frame_number):
         '''Returns the backing path for the given frame number.'''
         return os.path.join(
@@ -632,6 +697,15 @@ class VideoFramesFeaturizer(Featurizer):
                 raise
 
 
+def _make_gate_thumbnail(img, size):
+    # Downsamples the frame to a small grayscale thumbnail, which makes the
+    # motion gate cheap and insensitive to noise
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    thumb = cv2.resize(img, tuple(size), interpolation=cv2.INTER_AREA)
+    return thumb.astype(np.float32)
+
+
 class ORBFeaturizer(Featurizer):
     '''ORB (Oriented FAST and rotated BRIEF features) Featurizer.
 
@@ -20,13 +20,18 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 from builtins import *
+import six
+from six.moves import queue
 # pragma pylint: enable=redefined-builtin
 # pragma pylint: enable=unused-wildcard-import
 # pragma pylint: enable=wildcard-import
 
 import errno
+import multiprocessing
 import os
 from subprocess import Popen, PIPE
+import sys
+import threading
 
 import cv2
 import numpy as np
@@ -36,7 +41,8 @@ import eta.core.utils as etau
 import eta.core.web as etaw
 
 
-SUPPORTED_IMAGE_FORMATS = [".png", ".jpg", ".jpeg", ".gif", ".tiff", ".bmp"]
+SUPPORTED_IMAGE_FORMATS = [
+    ".png", ".jpg", ".jpeg", ".gif", ".tiff", ".bmp", ".webp"]
 
 
 def is_supported_image(filepath):
@@ -122,15 +128,140 @@ def read(path, flag=cv2.IMREAD_UNCHANGED):
     return _exchange_rb(cv2.imread(path, flag))
 
 
-def write(img, path):
+def write(
+        img, path, png_compression=None, jpeg_quality=None,
+        webp_quality=None):
     '''Writes image to file. The output directory is created if necessary.
 
+    The encoding parameters only apply to images of the corresponding format.
+    When a parameter is None, OpenCV's default is used.
+
     Args:
         img: a numpy array
         path: the output path
+        png_compression: an optional PNG compression level in [0, 9]. Lower
+            levels encode faster but produce larger files
+        jpeg_quality: an optional JPEG quality in [0, 100]
+        webp_quality: an optional WebP quality in [1, 100]. Qualities above
+            100 produce lossless images
     '''
+    params = _make_imwrite_params(
+        png_compression=png_compression, jpeg_quality=jpeg_quality,
+        webp_quality=webp_quality)
     etau.ensure_basedir(path)
-    cv2.imwrite(path, _exchange_rb(img))
+    cv2.imwrite(path, _exchange_rb(img), params)
+
+
+def _make_imwrite_params(
+        png_compression=None, jpeg_quality=None, webp_quality=None):
+    params = []
+    if png_compression is not None:
+        params += [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+    if jpeg_quality is not None:
+        params += [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+    if webp_quality is not None:
+        params += [cv2.IMWRITE_WEBP_QUALITY, int(webp_quality)]
+    return params
+
+
+class AsyncImageWriter(object):
+    '''Class for writing images to disk via a pool of background threads.
+
+    Encoding images, especially PNGs, is often much slower than producing
+    them. This class queues the images passed to `write()` and returns
+    immediately, while a pool of threads encodes and writes the queued images
+    in parallel, since OpenCV releases the GIL while encoding. Once
+    `queue_size` images are waiting to be written, `write()` blocks until a
+    thread is available.
+
+    The images passed to `write()` must not be modified afterwards, since
+    they may not have been written yet. Any error raised while writing an
+    image is re-raised by the next call to `write()` or by `close()`, which
+    waits for all queued images to be written.
+
+    The typical usage is:
+    ```
+    with AsyncImageWriter(png_compression=1) as writer:
+        for idx, img in enumerate(imgs, 1):
+            writer.write(img, "/path/to/frames/%05d.png" % idx)
+    ```
+    '''
+
+    # The default number of images that can be queued for writing
+    DEFAULT_QUEUE_SIZE = 16
+
+    def __init__(
+            self, num_workers=None, queue_size=DEFAULT_QUEUE_SIZE,
+            png_compression=None, jpeg_quality=None, webp_quality=None):
+        '''Constructs an AsyncImageWriter.
+
+        Args:
+            num_workers: the number of threads to use. By default,
+                `multiprocessing.cpu_count()` is used
+            queue_size: the maximum number of images that can be waiting to
+                be written. The default is `DEFAULT_QUEUE_SIZE`
+            png_compression: an optional PNG compression level. See `write()`
+            jpeg_quality: an optional JPEG quality. See `write()`
+            webp_quality: an optional WebP quality. See `write()`
+        '''
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.queue_size = queue_size
+
+        self._params = _make_imwrite_params(
+            png_compression=png_compression, jpeg_quality=jpeg_quality,
+            webp_quality=webp_quality)
+        self._queue = queue.Queue(maxsize=max(queue_size, 1))
+        self._exc_info = None
+        self._threads = []
+        for _ in range(self.num_workers):
+            thread = threading.Thread(target=self._run)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, img, path):
+        '''Queues the image for writing to the given path. The output
+        directory is created if necessary.
+
+        Args:
+            img: a numpy array
+            path: the output path
+        '''
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+        self._queue.put((img, path))
+
+    def close(self):
+        '''Closes the writer, waiting for all queued images to be written.'''
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._exc_info is not None:
+                continue  # discard images so that write() never blocks
+
+            img, path = item
+            try:
+                etau.ensure_basedir(path)
+                cv2.imwrite(path, _exchange_rb(img), self._params)
+            except Exception:
+                self._exc_info = sys.exc_info()
 
 
 ###### Image Manipulation #####################################################
@@ -701,6 +832,35 @@ def gray_to_rgb(img):
     return cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
 
 
+def split_yuv420p(img):
+    '''Splits a yuv420p image into its Y, U, and V planes.
+
+    Args:
+        img: a [3 * height / 2, width] array containing the stacked Y, U, and
+            V planes of a yuv420p image
+
+    Returns:
+        a (Y, U, V) tuple of views into the image. The Y plane has shape
+            [height, width] and the U and V planes have shape
+            [height / 2, width / 2]
+    '''
+    height = img.shape[0] * 2 // 3
+    width = img.shape[1]
+    npix = height * width
+    vec = img.reshape(-1)
+    y = vec[:npix].reshape(height, width)
+    u = vec[npix:npix * 5 // 4].reshape(height // 2, width // 2)
+    v = vec[npix * 5 // 4:].reshape(height // 2, width // 2)
+    return y, u, v
+
+
+def yuv420p_to_rgb(img):
+    '''Converts a yuv420p image whose Y, U, and V planes are stacked
+    vertically to an RGB image.
+    '''
+    return cv2.cvtColor(img, cv2.COLOR_YUV2RGB_I420)
+
+
 def rgb_to_bgr(img):
     '''Converts an RGB image to a BGR image (supports alpha).'''
     return _exchange_rb(img)
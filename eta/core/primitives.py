@@ -30,6 +30,10 @@ import eta.core.video as etav
 class DenseOpticalFlow(object):
     '''Base class for dense optical flow methods.'''
 
+    # The pixel format in which frames are passed to process_frame(). See
+    # `eta.core.video.FFmpegVideoReader.PIX_FMTS` for the supported formats
+    PIX_FMT = "rgb24"
+
     def process_video(
             self, input_path, cart_path=None, polar_path=None,
             video_path=None):
@@ -55,7 +59,9 @@ class DenseOpticalFlow(object):
         # VideoProcessor ensures that the output video directory exists
 
         self.reset()
-        with etav.VideoProcessor(input_path, out_video_path=video_path) as p:
+        with etav.VideoProcessor(
+                input_path, out_video_path=video_path,
+                in_pix_fmt=self.PIX_FMT) as p:
             for img in p:
                 # Compute optical flow
                 flow_cart = self.process_frame(img)
@@ -82,7 +88,7 @@ class DenseOpticalFlow(object):
         '''Computes the dense optical flow field for the next frame.
 
         Args:
-            img: an m x n x 3 image
+            img: an m x n image in `PIX_FMT` format
 
         Returns:
             an m x n x 2 array containing the optical flow vectors
@@ -137,6 +143,9 @@ class FarnebackDenseOpticalFlow(DenseOpticalFlow):
     function.
     '''
 
+    # Farneback's method operates on grayscale frames
+    PIX_FMT = "gray"
+
     def __init__(
             self,
             pyramid_scale=0.5,
@@ -400,6 +409,10 @@ class KNNBackgroundSubtractor(BackgroundSubtractor):
 class EdgeDetector(object):
     '''Base class for edge detection methods.'''
 
+    # The pixel format in which frames are passed to process_frame(). See
+    # `eta.core.video.FFmpegVideoReader.PIX_FMTS` for the supported formats
+    PIX_FMT = "rgb24"
+
     def process_video(self, input_path, masks_path=None, video_path=None):
         '''Detect edges using self.detector.
 
@@ -415,7 +428,9 @@ class EdgeDetector(object):
         # VideoProcessor ensures that the output video directory exists
 
         self.reset()
-        with etav.VideoProcessor(input_path, out_video_path=video_path) as p:
+        with etav.VideoProcessor(
+                input_path, out_video_path=video_path,
+                in_pix_fmt=self.PIX_FMT) as p:
             for img in p:
                 # Compute edges
                 edges = self.process_frame(img)
@@ -433,7 +448,7 @@ class EdgeDetector(object):
         '''Performs edge detection on the next frame.
 
         Args:
-            img: an image
+            img: an image in `PIX_FMT` format
 
         Returns:
             the edges mask
@@ -451,6 +466,9 @@ class CannyEdgeDetector(EdgeDetector):
     This class is a wrapper around the OpenCV `Canny` method.
     '''
 
+    # The Canny detector operates on grayscale frames
+    PIX_FMT = "gray"
+
     def __init__(
             self, threshold1=200, threshold2=50, aperture_size=3,
             l2_gradient=False):
@@ -481,6 +499,11 @@ class FeaturePointDetector(object):
 
     KEYPOINT_RGB_COLOR = (0, 255, 0)  # RGB
 
+    # The pixel format in which frames are passed to process_frame(). See
+    # `eta.core.video.FFmpegVideoReader.PIX_FMTS` for the supported formats.
+    # RGB frames are always read when a feature points video is requested
+    PIX_FMT = "rgb24"
+
     def process_video(self, input_path, coords_path=None, video_path=None):
         '''Detect feature points using self.detector.
 
@@ -495,8 +518,13 @@ class FeaturePointDetector(object):
             etau.ensure_basedir(coords_path)
         # VideoProcessor ensures that the output video directory exists
 
+        # The feature points are drawn on the RGB frames
+        in_pix_fmt = "rgb24" if video_path else self.PIX_FMT
+
         self.reset()
-        with etav.VideoProcessor(input_path, out_video_path=video_path) as p:
+        with etav.VideoProcessor(
+                input_path, out_video_path=video_path,
+                in_pix_fmt=in_pix_fmt) as p:
             for img in p:
                 # Compute feature points
                 keypoints = self.process_frame(img)
@@ -518,7 +546,7 @@ class FeaturePointDetector(object):
         '''Detects feature points in the next frame.
 
         Args:
-            img: an image
+            img: an image in `PIX_FMT` format, or an RGB image
 
         Returns:
             a list of `cv2.KeyPoint`s describing the detected features
@@ -536,6 +564,9 @@ class HarrisFeaturePointDetector(FeaturePointDetector):
     This class is a wrapper around the OpenCV `cornerHarris` method.
     '''
 
+    # The Harris detector operates on grayscale frames
+    PIX_FMT = "gray"
+
     def __init__(self, threshold=0.01, block_size=3, aperture_size=3, k=0.04):
         '''Creates a new HarrisEdgeDetector object.
 
@@ -539,6 +539,26 @@ class NpzFileSequence(FileSequence, ConcreteData):
         )
 
 
+class DecodedFrameCache(File, ConcreteData):
+    '''A cache of the decoded frames of a video, stored as a `.npy` file
+    along with a JSON header with the same base name.
+
+    This type is implemented in ETA by the
+    `eta.core.video.DecodedFrameCache` class.
+
+    Examples:
+        /path/to/video.mp4.decoded.npy
+    '''
+
+    @staticmethod
+    def gen_path(basedir, params):
+        return os.path.join(basedir, "{name}.decoded.npy").format(**params)
+
+    @staticmethod
+    def is_valid_path(path):
+        return File.is_valid_path(path) and etau.has_extension(path, ".npy")
+
+
 class NpzFileDirectory(Directory):
     '''A directory containing one or more .npz files.
 
@@ -510,7 +510,12 @@ def ensure_dir(dirname):
     '''Makes the given directory, if necessary.'''
     if dirname and not os.path.isdir(dirname):
         logger.debug("Making directory '%s'", dirname)
-        os.makedirs(dirname)
+        try:
+            os.makedirs(dirname)
+        except OSError as e:
+            # The directory may have been made concurrently
+            if e.errno != errno.EEXIST:
+                raise
 
 
 def has_extension(filename, *args):
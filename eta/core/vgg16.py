@@ -492,5 +492,8 @@ class VGG16Featurizer(Featurizer):
         elif etai.has_alpha(img):
             img = img[:, :, :3]
 
-        imgs = [etai.resize(img, 224, 224)]
+        if img.shape[:2] != (224, 224):
+            img = etai.resize(img, 224, 224)
+
+        imgs = [img]
         return self.vgg16.evaluate(imgs, layer=self.vgg16.fc2l)[0]
@@ -20,22 +20,36 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 from builtins import *
-from future.utils import iteritems
 import six
+from six.moves import queue
 # pragma pylint: enable=redefined-builtin
 # pragma pylint: enable=unused-wildcard-import
 # pragma pylint: enable=wildcard-import
 
+from collections import deque, OrderedDict
+import copy
+import ctypes
 import errno
+import fcntl
+import hashlib
+import itertools
 import json
 import logging
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import os
+import re
+import sqlite3
 from subprocess import Popen, PIPE
+import sys
+import tempfile
 import threading
 
 import cv2
 import numpy as np
 
+import eta
+import eta.core.events as etae
 import eta.core.image as etai
 from eta.core.serial import Serializable
 import eta.core.utils as etau
@@ -207,11 +221,16 @@ class VideoStreamInfoError(Exception):
     pass
 
 
-def get_stream_info(inpath):
+def get_stream_info(inpath, use_cache=True):
     '''Get stream info for the video using `ffprobe -show_streams`.
 
+    By default, the stream info is cached in `stream_info_cache`, so ffprobe
+    is only run once per video file.
+
     Args:
         inpath: video path
+        use_cache: whether to use the stream info cache. By default, this is
+            True
 
     Returns:
         stream: a dictionary of stream info
@@ -219,6 +238,48 @@ def get_stream_info(inpath):
     Raises:
         FFprobeError: if no stream info was found
     '''
+    if use_cache:
+        return stream_info_cache.get(inpath, _probe_stream_info)
+
+    return _probe_stream_info(inpath)
+
+
+def get_stream_info_many(inpaths, max_workers=None, use_cache=True):
+    '''Get stream info for multiple videos by running up to `max_workers`
+    ffprobe processes concurrently.
+
+    Args:
+        inpaths: a list of video paths
+        max_workers: the maximum number of concurrent ffprobe processes. By
+            default, the number of CPUs is used
+        use_cache: whether to use the stream info cache. By default, this is
+            True
+
+    Returns:
+        a list of (stream_info, error) tuples, in the same order as
+            `inpaths`. If the stream info for a video was found, `error` is
+            None; otherwise, `stream_info` is None and `error` is the
+            FFprobeError that was raised
+    '''
+    def _get_stream_info(inpath):
+        try:
+            return get_stream_info(inpath, use_cache=use_cache), None
+        except FFprobeError as e:
+            return None, e
+
+    if not inpaths:
+        return []
+
+    max_workers = max_workers or multiprocessing.cpu_count()
+    pool = ThreadPool(min(max_workers, len(inpaths)))
+    try:
+        return pool.map(_get_stream_info, inpaths, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _probe_stream_info(inpath):
     try:
         ffprobe = FFprobe(opts=[
             "-show_streams",             # get stream info
@@ -240,6 +301,160 @@ def get_stream_info(inpath):
         raise FFprobeError("Unable to get stream info for '%s'" % inpath)
 
 
+class StreamInfoCache(object):
+    '''A cache of the stream info of video files.
+
+    Entries are keyed by the real path, size, and modification time of each
+    video file, so they are invalidated when a file is modified. The cache has
+    two layers:
+        - an in-process LRU cache of the `max_size` most recently used entries
+        - an optional SQLite database that persists entries across processes,
+          e.g., across the modules of a pipeline. The database is used when
+          `db_path` or the `stream_info_cache_path` ETA config setting is set
+
+    Inputs that are not files, such as image sequence patterns, are never
+    cached. This class is thread-safe. Only the in-process cache is guarded by
+    a lock; each thread uses its own SQLite connection, so lookups are not
+    serialized behind database I/O.
+    '''
+
+    # The default number of entries in the in-process cache
+    DEFAULT_MAX_SIZE = 4096
+
+    def __init__(self, max_size=None, db_path=None):
+        '''Constructs a StreamInfoCache.
+
+        Args:
+            max_size: the maximum number of entries in the in-process cache.
+                By default, `DEFAULT_MAX_SIZE` is used
+            db_path: an optional path to a SQLite database in which to
+                persist entries. By default, the `stream_info_cache_path` ETA
+                config setting is used, if set
+        '''
+        self.max_size = max_size or self.DEFAULT_MAX_SIZE
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def get(self, inpath, fcn):
+        '''Gets the stream info for the given video.
+
+        Args:
+            inpath: the video path
+            fcn: a function that computes the stream info dictionary for the
+                given video path on a cache miss
+
+        Returns:
+            the stream info dictionary
+        '''
+        key = self._make_key(inpath)
+        if key is None:
+            return fcn(inpath)
+
+        with self._lock:
+            info = self._lru.pop(key, None)
+            if info is not None:
+                self.hits += 1
+                self._lru_put(key, info)
+
+        if info is not None:
+            return copy.deepcopy(info)
+
+        # The lock is not held while the database is queried or ffprobe is
+        # running
+        info = self._db_get(key)
+        if info is not None:
+            with self._lock:
+                self.hits += 1
+                self._lru_put(key, info)
+            return copy.deepcopy(info)
+
+        info = fcn(inpath)
+
+        with self._lock:
+            self.misses += 1
+            self._lru_put(key, info)
+
+        self._db_put(key, info)
+
+        return copy.deepcopy(info)
+
+    def clear(self):
+        '''Clears the in-process cache and resets the hit/miss counters. The
+        SQLite database, if any, is not modified.
+        '''
+        with self._lock:
+            self._lru.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def _make_key(inpath):
+        try:
+            st = os.stat(inpath)
+        except OSError:
+            return None
+        return os.path.realpath(inpath), st.st_size, st.st_mtime
+
+    def _lru_put(self, key, info):
+        self._lru[key] = info
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    def _get_db(self):
+        db_path = self.db_path or eta.config.stream_info_cache_path
+        if not db_path:
+            return None
+
+        # Each thread uses its own connection, and connections cannot be
+        # shared across forked processes
+        db_id = (os.getpid(), db_path)
+        if getattr(self._local, "db_id", None) != db_id:
+            etau.ensure_basedir(db_path)
+            db = sqlite3.connect(db_path, timeout=60)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS stream_info ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, info TEXT)")
+            db.commit()
+            self._local.db = db
+            self._local.db_id = db_id
+
+        return self._local.db
+
+    def _db_get(self, key):
+        try:
+            db = self._get_db()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT info FROM stream_info "
+                "WHERE path = ? AND size = ? AND mtime = ?", key).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Unable to read stream info cache: %s", e)
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _db_put(self, key, info):
+        try:
+            db = self._get_db()
+            if db is None:
+                return
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO stream_info VALUES (?, ?, ?, ?)",
+                    key + (json.dumps(info),))
+        except sqlite3.Error as e:
+            logger.warning("Unable to write stream info cache: %s", e)
+
+
+# The stream info cache used by `get_stream_info()`
+stream_info_cache = StreamInfoCache()
+
+
 def get_encoding_str(inpath, use_ffmpeg=True):
     '''Get the encoding string of the input video.
 
@@ -288,6 +503,44 @@ def get_frame_count(inpath, use_ffmpeg=True):
         return r.total_frame_count
 
 
+def get_keyframe_numbers(inpath):
+    '''Get the frame numbers of the keyframes of the video using
+    `ffprobe -skip_frame nokey -show_frames`.
+
+    Only the keyframes are decoded. Their timestamps are converted to frame
+    numbers using the frame rate of the video, so this function assumes that
+    the video has a constant frame rate.
+
+    Args:
+        inpath: video path
+
+    Returns:
+        a sorted list of the 1-based frame numbers of the keyframes
+
+    Raises:
+        FFprobeError: if the keyframes could not be determined
+    '''
+    stream_info = VideoStreamInfo.build_for(inpath)
+    try:
+        ffprobe = FFprobe(opts=[
+            "-select_streams", "v:0",            # only the video stream
+            "-skip_frame", "nokey",              # only decode keyframes
+            "-show_entries", "frame=best_effort_timestamp_time",
+            "-print_format", "json",             # return in JSON format
+        ])
+        out = ffprobe.run(inpath, decode=True)
+
+        start_time = float(stream_info.stream_info.get("start_time", 0))
+        fps = stream_info.frame_rate
+        return sorted(set(
+            int(round((float(f["best_effort_timestamp_time"]) - start_time) *
+                      fps)) + 1
+            for f in json.loads(out)["frames"]
+            if "best_effort_timestamp_time" in f))
+    except:
+        raise FFprobeError("Unable to get keyframes for '%s'" % inpath)
+
+
 def get_raw_frame_number(raw_frame_rate, raw_frame_count, fps, sampled_frame):
     '''Get the raw frame number corresponding to the given sampled frame
     number.
@@ -328,18 +581,18 @@ def sample_first_frames(arg, k, size=None):
     '''
     # Read frames ...
     if isinstance(arg, six.string_types):
-        # ... from disk
-        with FFmpegVideoReader(arg, frames="1-%d" % k) as vr:
-            imgs = [img for img in vr]
+        # ... from disk, resizing them in ffmpeg
+        with FFmpegVideoReader(arg, frames="1-%d" % k, size=size) as vr:
+            imgs = vr.read_batch(k)[0]
     else:
         # ... from tensor
         imgs = arg[:k]
 
-    # Resize frames, if necessary
-    if size:
-        imgs = [etai.resize(img, *size) for img in imgs]
+        # Resize frames, if necessary
+        if size:
+            imgs = [etai.resize(img, *size) for img in imgs]
 
-    return np.array(imgs)
+    return np.asarray(imgs)
 
 
 def uniformly_sample_frames(arg, k, size=None):
@@ -364,24 +617,34 @@ def uniformly_sample_frames(arg, k, size=None):
 
     # Read frames ...
     if is_video_file:
-        # ... from disk
-        with FFmpegVideoReader(arg, frames=frames) as vr:
-            imgs = [img for img in vr]
+        # ... from disk, resizing them in ffmpeg
+        with FFmpegVideoReader(
+                arg, frames=frames, seek=True, size=size) as vr:
+            imgs = vr.read_batch(len(frames))[0]
     else:
         # ... from tensor
         imgs = [arg[f - 1] for f in frames]
 
-    # Resize frames, if necessary
-    if size:
-        imgs = [etai.resize(img, *size) for img in imgs]
+        # Resize frames, if necessary
+        if size:
+            imgs = [etai.resize(img, *size) for img in imgs]
+
+    return np.asarray(imgs)
+
 
-    return np.array(imgs)
+# The number of clips that `sliding_window_sample_frames()` reads at a time
+_SLIDING_WINDOW_BATCH_SIZE = 8
 
 
 def sliding_window_sample_frames(arg, k, stride, size=None):
     '''Samples clips from the video using a sliding window of the given
     length and stride.
 
+    The returned tensor contains a copy of each frame for every clip that
+    contains it, so its size grows with the length of the video. Use
+    `iter_sliding_window_clips()` to process the clips of long videos in
+    constant memory.
+
     Args:
         arg: can be either the path to the input video or an array of frames
             of size [num_frames, height, width, num_channels]
@@ -393,37 +656,235 @@ def sliding_window_sample_frames(arg, k, stride, size=None):
     Returns:
         A numpy array of size [XXXX, k, height, width, num_channels]
     '''
-    is_video_file = isinstance(arg, six.string_types)
+    # The clips are streamed in small batches and copied into the output
+    # array, so the only other memory used is the small read buffer of
+    # `iter_sliding_window_clips()`
+    num_clips = len(_get_sliding_window_offsets(arg, k, stride))
+    clips = None
+    idx = 0
+    for batch in iter_sliding_window_clips(
+            arg, k, stride, size=size, batch_size=_SLIDING_WINDOW_BATCH_SIZE):
+        if clips is None:
+            clips = np.empty((num_clips,) + batch.shape[1:], dtype=batch.dtype)
+        clips[idx:idx + len(batch)] = batch
+        idx += len(batch)
+
+    if clips is None:
+        return np.array([])
+
+    return clips[:idx]
+
+
+def iter_sliding_window_clips(arg, k, stride, size=None, batch_size=None):
+    '''Returns a generator that emits the clips of the video given by a
+    sliding window of the given length and stride.
+
+    The frames are decoded into a buffer that holds a few batches of clips,
+    and each clip (or batch of clips) is emitted as a read-only view into the
+    buffer, constructed via `np.lib.stride_tricks.as_strided()`, in which
+    overlapping clips share the memory of their common frames. Thus the
+    memory usage is proportional to `k` and `batch_size` rather than to the
+    length of the video.
+
+    Since the buffer is reused, an emitted clip is only valid until the
+    generator is advanced, so callers that keep clips around must explicitly
+    copy them via `clip.copy()`.
+
+    Args:
+        arg: can be either the path to the input video or an array of frames
+            of size [num_frames, height, width, num_channels]
+        k: the size of each window
+        stride: the stride for sliding window
+        size: an optional [width, height] to resize the sampled frames. By
+            default, the native dimensions of the frames are used
+        batch_size: an optional number of clips to emit at a time. By
+            default, clips are emitted individually
+
+    Returns:
+        a generator that emits [k, height, width, num_channels] clips or, if
+            `batch_size` is provided, [XXXX, k, height, width, num_channels]
+            batches of up to `batch_size` clips
+    '''
+    offsets = _get_sliding_window_offsets(arg, k, stride)
+    if not offsets:
+        return
+
+    # When the windows do not overlap, only the frames of the clips are
+    # decoded, so consecutive clips lie `k` frames apart in the buffer
+    frames = sorted(set(
+        f for offset in offsets for f in range(offset + 1, offset + k + 1)))
+    step = min(stride, k)
+    num_clips = len(offsets)
+    num_batch = batch_size or 1
+    span = (num_batch - 1) * step + k  # the number of frames of a batch
+
+    buf = None
+    start = 0  # the buffer position of the first frame of the next clip
+    end = 0  # the number of frames in the buffer
+    num_emitted = 0
+    for img in _iter_sampled_frames(arg, frames, size):
+        if buf is None:
+            # Holding two batches amortizes the cost of compacting the buffer
+            buf = np.empty((2 * span,) + img.shape, dtype=img.dtype)
+        if end == len(buf):
+            # Move the frames of the remaining clips to the front
+            buf[:end - start] = buf[start:end]
+            end -= start
+            start = 0
+
+        buf[end] = img
+        end += 1
+
+        if end - start == span:
+            n = min(num_batch, num_clips - num_emitted)
+            yield _make_clips_view(buf, start, n, k, step, batch_size)
+            start += n * step
+            num_emitted += n
+
+    # Emit a final partial batch, if necessary
+    if num_emitted < num_clips and buf is not None:
+        n = min((end - start - k) // step + 1, num_clips - num_emitted)
+        if n > 0:
+            yield _make_clips_view(buf, start, n, k, step, batch_size)
+
+
+def adaptively_sample_frames(
+        inpath, method="scene", scene_threshold=0.3, min_spacing=None,
+        max_spacing=None, frame_index=None):
+    '''Samples the frames of the video at which its content changes.
+
+    Unlike the other sampling methods, the frames are chosen based on the
+    content of the video, so few frames are sampled from static scenes. The
+    following methods are supported:
+        "scene": frames whose scene change score, as computed by
+            `get_scene_scores()`, exceeds `scene_threshold`
+        "keyframes": the keyframes of the video, which encoders typically
+            place at scene changes, as recorded in its FrameIndex. This only
+            requires parsing the video rather than decoding it
+
+    The first frame is always sampled. Candidate frames that lie within
+    `min_spacing` frames of the previous sampled frame are skipped, and
+    frames are inserted as necessary so that consecutive sampled frames lie
+    at most `max_spacing` frames apart.
+
+    Args:
+        inpath: the path to the input video
+        method: the sampling method, "scene" or "keyframes". By default,
+            "scene" is used
+        scene_threshold: the scene change score, in [0, 1], above which
+            frames are sampled when `method` is "scene". By default, 0.3 is
+            used
+        min_spacing: an optional minimum number of frames between
+            consecutive sampled frames
+        max_spacing: an optional maximum number of frames between
+            consecutive sampled frames
+        frame_index: an optional FrameIndex for the video, which is used when
+            `method` is "keyframes". By default, the index is loaded or built
+            via `FrameIndex.build_for()`
+
+    Returns:
+        a FrameRanges instance describing the sampled frames
+
+    Raises:
+        ValueError: if the method is invalid or `max_spacing < min_spacing`
+    '''
+    # The spacings may be parsed from JSON as floats
+    min_spacing = int(min_spacing or 1)
+    max_spacing = int(max_spacing) if max_spacing else None
+    if max_spacing and max_spacing < min_spacing:
+        raise ValueError(
+            "max_spacing %d is less than min_spacing %d" % (
+                max_spacing, min_spacing))
+
+    if method == "scene":
+        scores = get_scene_scores(inpath)
+        num_frames = len(scores)
+        candidates = np.flatnonzero(scores > scene_threshold) + 1
+    elif method == "keyframes":
+        frame_index = frame_index or FrameIndex.build_for(inpath)
+        num_frames = frame_index.num_frames
+        candidates = frame_index.keyframe_numbers
+    else:
+        raise ValueError("Invalid sampling method '%s'" % method)
+
+    frames = [1]
+    for fn in list(candidates) + [num_frames + 1]:
+        fn = int(fn)
+        while max_spacing and fn - frames[-1] > max_spacing:
+            frames.append(frames[-1] + max_spacing)
+        if fn <= num_frames and fn - frames[-1] >= min_spacing:
+            frames.append(fn)
+
+    return FrameRanges.from_list(frames)
+
+
+def get_scene_scores(inpath):
+    '''Computes the scene change scores of the frames of the video via the
+    `scene` variable of ffmpeg's `select` filter.
 
-    # Determine clip indices
+    The score of a frame measures how much it differs from the previous
+    frame, from 0 (identical) to 1 (completely different). Scores above 0.3
+    typically indicate a scene cut.
+
+    Args:
+        inpath: the path to the input video
+
+    Returns:
+        an array containing the score of each frame of the video
+
+    Raises:
+        ExecutableRuntimeError: if ffmpeg fails to analyze the video
+    '''
+    # The metadata filter prints the score of every frame to stdout
+    args = ["ffmpeg"] + FFmpeg.DEFAULT_GLOBAL_OPTS + [
+        "-i", inpath,
+        "-vf", "select='gte(scene,0)',"
+        "metadata=print:key=lavfi.scene_score:file=-",
+        "-an", "-f", "null", "-",
+    ]
+    out = etau.communicate_or_die(args, decode=True)
+
+    scores = [
+        float(line.split("=", 1)[1]) for line in out.splitlines()
+        if line.startswith("lavfi.scene_score=")]
+    if not scores:
+        raise etau.ExecutableRuntimeError(
+            " ".join(args), "No frames of '%s' were analyzed" % inpath)
+
+    return np.array(scores)
+
+
+def _get_sliding_window_offsets(arg, k, stride):
+    # Returns the 0-based offsets of the first frames of the sliding windows
+    is_video_file = isinstance(arg, six.string_types)
     num_frames = get_frame_count(arg) if is_video_file else len(arg)
-    delta = np.arange(1, k + 1)
-    offsets = np.array(list(range(0, num_frames + 1 - k, stride)))
-    clip_inds = offsets[:, np.newaxis] + delta[np.newaxis, :]
-    frames = list(np.unique(clip_inds))
+    return list(range(0, num_frames + 1 - k, stride))
 
-    # Read frames ...
-    imgs = {}
-    if is_video_file:
-        # ... from disk
-        with FFmpegVideoReader(arg, frames=frames) as vr:
+
+def _iter_sampled_frames(arg, frames, size):
+    # Emits the given 1-based frames of the video, resized if necessary
+    if isinstance(arg, six.string_types):
+        # ... from disk, resizing them in ffmpeg
+        with FFmpegVideoReader(
+                arg, frames=frames, size=size, zero_copy=True) as vr:
             for img in vr:
-                imgs[vr.frame_number] = img
+                yield img
     else:
         # ... from tensor
         for fn in frames:
-            imgs[fn] = arg[fn - 1]
+            img = arg[fn - 1]
+            yield etai.resize(img, *size) if size else img
 
-    # Resize frames, if necessary
-    if size:
-        imgs = {fn: etai.resize(img, *size) for fn, img in iteritems(imgs)}
 
-    # Generate clips tensor
-    clips = []
-    for inds in clip_inds:
-        clips.append(np.array([imgs[k] for k in inds]))
-
-    return np.array(clips)
+def _make_clips_view(buf, start, num_clips, k, step, batch_size):
+    # Returns a read-only view of `num_clips` clips of length `k` whose first
+    # frames lie `step` frames apart, starting at the given buffer position
+    frames = buf[start:]
+    clips = np.lib.stride_tricks.as_strided(
+        frames, shape=(num_clips, k) + frames.shape[1:],
+        strides=(step * frames.strides[0],) + frames.strides)
+    clips.flags.writeable = False
+    return clips if batch_size else clips[0]
 
 
 class VideoProcessor(object):
@@ -449,7 +910,17 @@ class VideoProcessor(object):
             out_clips_path=None,
             out_fps=None,
             out_size=None,
-            out_opts=None):
+            out_opts=None,
+            prefetch=0,
+            size=None,
+            scale=None,
+            interpolation="bicubic",
+            in_pix_fmt="rgb24",
+            out_pix_fmt="rgb24",
+            out_use_segment_muxer=False,
+            out_images_workers=None,
+            out_images_params=None,
+            in_frame_cache_path=None):
         '''Constructs a new VideoProcessor instance.
 
         Args:
@@ -480,15 +951,62 @@ class VideoProcessor(object):
             out_opts: a list of output video options for FFmpeg. Passed
                 directly to FFmpegVideoWriter. Only applicable when
                 out_use_ffmpeg = True
+            prefetch: the number of frames to decode ahead of the caller in a
+                background thread, which allows decoding to overlap with the
+                processing of each frame. Passed directly to a VideoReader
+            size: an optional (width, height) to which to resize the input
+                frames as they are decoded. Only applicable when
+                in_use_ffmpeg = True
+            scale: an optional factor by which to resize the input frames as
+                they are decoded. Only applicable when in_use_ffmpeg = True
+            interpolation: the ffmpeg scaling algorithm to use when resizing
+                the input frames. Only applicable when in_use_ffmpeg = True
+            in_pix_fmt: the pixel format of the input frames, which can be
+                any of `FFmpegVideoReader.PIX_FMTS`. Only "rgb24" is supported
+                when in_use_ffmpeg = False
+            out_pix_fmt: the pixel format of the frames passed to the write()
+                method for writing videos, which can be any of
+                `FFmpegVideoReader.PIX_FMTS`. Only "rgb24" is supported when
+                out_use_ffmpeg = False
+            out_use_segment_muxer: whether to write all output clips with a
+                single ffmpeg process via FFmpegVideoClipsWriter rather than
+                starting a new writer for each clip, which is much faster
+                when writing many short clips. In this case, exactly one
+                frame must be passed to write() per input frame. Only
+                applicable when out_use_ffmpeg = True
+            out_images_workers: the number of background threads with which
+                to encode the images written to out_images_path via
+                etai.AsyncImageWriter. If 0, images are written synchronously
+                by the write() method. By default,
+                `multiprocessing.cpu_count()` threads are used
+            out_images_params: an optional dictionary of encoding parameters
+                for the images written to out_images_path, such as
+                `{"png_compression": 1}`. See `etai.write()` for the
+                supported parameters
+            in_frame_cache_path: an optional path to the `.npy` file of a
+                DecodedFrameCache of the input video from which to read the
+                frames, if it contains them. Only applicable when
+                in_use_ffmpeg = True
 
         Raises:
             VideoProcessorError: if insufficient options are supplied to
                 construct a VideoWriter
         '''
         if in_use_ffmpeg:
-            self._reader = FFmpegVideoReader(inpath, frames=frames)
+            self._reader = FFmpegVideoReader(
+                inpath, frames=frames, prefetch=prefetch, size=size,
+                scale=scale, interpolation=interpolation,
+                pix_fmt=in_pix_fmt, frame_cache_path=in_frame_cache_path)
+        elif size is not None or scale is not None:
+            raise VideoProcessorError(
+                "Resizing input frames requires in_use_ffmpeg = True")
+        elif in_pix_fmt != "rgb24":
+            raise VideoProcessorError(
+                "in_pix_fmt '%s' requires in_use_ffmpeg = True" % in_pix_fmt)
         else:
-            self._reader = OpenCVVideoReader(inpath, frames=frames)
+            self._reader = OpenCVVideoReader(
+                inpath, frames=frames, prefetch=prefetch)
+        self._image_writer = None
         self._video_clip_writer = None
         self._video_writer = None
         self._write_images = bool(out_images_path)
@@ -500,6 +1018,8 @@ class VideoProcessor(object):
         self.in_use_ffmpeg = in_use_ffmpeg
         self.out_use_ffmpeg = out_use_ffmpeg
         self.out_images_path = out_images_path
+        self.out_images_workers = out_images_workers
+        self.out_images_params = out_images_params or {}
         self.out_video_path = out_video_path
         self.out_clips_path = out_clips_path
         if out_fps is not None and out_fps > 0:
@@ -512,10 +1032,29 @@ class VideoProcessor(object):
                 "manually specify a frame rate" % str(self._reader.frame_rate))
         self.out_size = out_size if out_size else self._reader.frame_size
         self.out_opts = out_opts
+        self.out_pix_fmt = out_pix_fmt
+        if out_pix_fmt != "rgb24" and not out_use_ffmpeg:
+            raise VideoProcessorError(
+                "out_pix_fmt '%s' requires out_use_ffmpeg = True" %
+                out_pix_fmt)
+
+        self.out_use_segment_muxer = out_use_segment_muxer
+        if out_use_segment_muxer and not out_use_ffmpeg:
+            raise VideoProcessorError(
+                "out_use_segment_muxer = True requires out_use_ffmpeg = True")
 
+        if self._write_images and self.out_images_workers != 0:
+            self._image_writer = etai.AsyncImageWriter(
+                num_workers=self.out_images_workers,
+                **self.out_images_params)
         if self._write_video:
             self._video_writer = self._new_video_writer(
                 self.out_video_path)
+        if self._write_clips and self.out_use_segment_muxer:
+            self._video_clip_writer = FFmpegVideoClipsWriter(
+                self.out_clips_path, self.out_fps, self.out_size,
+                FrameRanges.from_str(self._reader.frames),
+                out_opts=self.out_opts, pix_fmt=self.out_pix_fmt)
 
     def __enter__(self):
         return self
@@ -579,33 +1118,152 @@ class VideoProcessor(object):
         return img
 
     def write(self, img):
-        '''Writes the given image to the output writer(s).'''
+        '''Writes the given image to the output writer(s).
+
+        When `out_use_ffmpeg = True`, frames are encoded asynchronously by
+        FFmpegVideoWriter, and, unless `out_images_workers = 0`, images are
+        encoded asynchronously by etai.AsyncImageWriter, so the image must not
+        be modified after it is passed to this method.
+        '''
+        self._write(img, self._reader.frame_number)
+
+    def map(self, fcn, workers=None, backend="thread", max_in_flight=None):
+        '''Applies the function to each frame in parallel and writes the
+        results to the output writer(s) in frame order.
+
+        This method is equivalent to:
+        ```
+        for img in p:
+            p.write(fcn(img))
+        ```
+        except that up to `max_in_flight` frames are processed concurrently
+        by a pool of workers. The frames are decoded and the results are
+        written by the calling thread.
+
+        With the "thread" backend, the function runs in parallel to the
+        extent that it releases the GIL, as numpy and OpenCV do. With the
+        "process" backend, the function must be picklable, and the frames
+        are passed to the worker processes via shared memory.
+
+        Args:
+            fcn: a function that accepts a frame and returns the image to
+                write, or None if nothing should be written for the frame
+            workers: the number of workers to use. By default,
+                `multiprocessing.cpu_count()` is used
+            backend: the kind of workers to use, "thread" or "process". The
+                default is "thread"
+            max_in_flight: the maximum number of frames that can be decoded
+                but not yet written. By default, `2 * workers` is used
+
+        Raises:
+            VideoProcessorError: if the backend is not supported
+        '''
+        if backend not in ("thread", "process"):
+            raise VideoProcessorError("Unsupported backend '%s'" % backend)
+
+        workers = workers or multiprocessing.cpu_count()
+        max_in_flight = max(max_in_flight or 2 * workers, 1)
+
+        try:
+            img = self._reader.read()
+        except StopIteration:
+            return
+
+        if backend == "process":
+            # Frames are copied into a ring of shared memory slots, which can
+            # be reused in order since the results are collected in order
+            slots = multiprocessing.RawArray(
+                ctypes.c_uint8, max_in_flight * img.nbytes)
+            frames = _as_frame_slots(
+                slots, img.shape, img.dtype.str, max_in_flight)
+            pool = multiprocessing.Pool(
+                workers, initializer=_init_map_worker,
+                initargs=(fcn, slots, img.shape, img.dtype.str, max_in_flight))
+        else:
+            pool = ThreadPool(workers)
+
+        pending = deque()
+        count = 0
+        try:
+            while True:
+                if len(pending) >= max_in_flight:
+                    self._write_map_result(pending.popleft())
+
+                if backend == "process":
+                    slot = count % max_in_flight
+                    frames[slot] = img
+                    result = pool.apply_async(_map_worker, (slot,))
+                else:
+                    result = pool.apply_async(fcn, (img,))
+
+                pending.append((
+                    result, self._reader.frame_number,
+                    self._reader.frame_range,
+                    self._reader.is_new_frame_range))
+                count += 1
+
+                try:
+                    img = self._reader.read()
+                except StopIteration:
+                    break
+
+            while pending:
+                self._write_map_result(pending.popleft())
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _write_map_result(self, item):
+        result, frame_number, frame_range, is_new_frame_range = item
+        img = result.get()
+        if self._write_clips and is_new_frame_range:
+            self._reset_video_clip_writer(frame_range)
+        if img is not None:
+            self._write(img, frame_number)
+
+    def _write(self, img, frame_number):
         if self._write_images:
-            etai.write(img, self.out_images_path % self._reader.frame_number)
+            path = self.out_images_path % frame_number
+            if self._image_writer is not None:
+                self._image_writer.write(img, path)
+            else:
+                etai.write(img, path, **self.out_images_params)
         if self._write_video:
             self._video_writer.write(img)
         if self._write_clips:
             self._video_clip_writer.write(img)
 
     def close(self):
-        '''Closes the video processor.'''
+        '''Closes the video processor, waiting for any queued images and
+        frames to be written.
+        '''
         self._reader.close()
+        if self._image_writer is not None:
+            self._image_writer.close()
         if self._video_writer is not None:
             self._video_writer.close()
         if self._video_clip_writer is not None:
             self._video_clip_writer.close()
 
-    def _reset_video_clip_writer(self):
+    def _reset_video_clip_writer(self, frame_range=None):
+        if frame_range is None:
+            frame_range = self._reader.frame_range
+
+        if self.out_use_segment_muxer:
+            self._video_clip_writer.start_clip(frame_range)
+            return
+
         if self._video_clip_writer is not None:
             self._video_clip_writer.close()
 
-        outpath = self.out_clips_path % self._reader.frame_range
+        outpath = self.out_clips_path % frame_range
         self._video_clip_writer = self._new_video_writer(outpath)
 
     def _new_video_writer(self, outpath):
         if self.out_use_ffmpeg:
             return FFmpegVideoWriter(
-                outpath, self.out_fps, self.out_size, out_opts=self.out_opts)
+                outpath, self.out_fps, self.out_size, out_opts=self.out_opts,
+                pix_fmt=self.out_pix_fmt)
 
         return OpenCVVideoWriter(
             outpath, self.out_fps, self.out_size)
@@ -615,11 +1273,39 @@ class VideoProcessorError(Exception):
     pass
 
 
+# State of the worker processes of `VideoProcessor.map()`
+_map_worker_state = {}
+
+
+def _as_frame_slots(slots, shape, dtype, num_slots):
+    return np.frombuffer(slots, dtype=np.dtype(dtype)).reshape(
+        (num_slots,) + tuple(shape))
+
+
+def _init_map_worker(fcn, slots, shape, dtype, num_slots):
+    _map_worker_state["fcn"] = fcn
+    _map_worker_state["frames"] = _as_frame_slots(
+        slots, shape, dtype, num_slots)
+
+
+def _map_worker(slot):
+    return _map_worker_state["fcn"](_map_worker_state["frames"][slot])
+
+
 class VideoReader(object):
-    '''Base class for reading videos.'''
+    '''Base class for reading videos.
 
-    def __init__(self, inpath, frames):
+    When `prefetch > 0`, frames are decoded by a background thread that runs
+    up to `prefetch` frames ahead of the caller, so decoding overlaps with any
+    processing that the caller performs on each frame. Subclasses implement
+    `_read()` and `_close()`, which are only ever invoked by one thread at a
+    time.
+    '''
+
+    def __init__(self, inpath, frames, prefetch=0):
         self.inpath = inpath
+        self.prefetch = prefetch
+        self._prefetcher = None
         if frames is None:
             self.frames = "1-%d" % self.total_frame_count
             self._ranges = FrameRanges.from_str(self.frames)
@@ -633,8 +1319,12 @@ class VideoReader(object):
             # Frames list
             self._ranges = FrameRanges.from_list(frames)
             self.frames = self._ranges.to_str()
-        elif isinstance(frames, (FrameRange, FrameRanges)):
-            # FrameRange or FrameRanges
+        elif isinstance(frames, FrameRange):
+            # FrameRange
+            self._ranges = FrameRanges([(frames.first, frames.last)])
+            self.frames = frames.to_str()
+        elif isinstance(frames, FrameRanges):
+            # FrameRanges
             self._ranges = frames
             self.frames = frames.to_str()
         else:
@@ -655,6 +1345,8 @@ class VideoReader(object):
     @property
     def frame_number(self):
         '''The current frame number, or -1 if no frames have been read.'''
+        if self._prefetcher is not None:
+            return self._prefetcher.frame_number
         return self._ranges.frame
 
     @property
@@ -662,11 +1354,15 @@ class VideoReader(object):
         '''The (first, last) frames for the current range, or (-1, -1) if no
         frames have been read.
         '''
+        if self._prefetcher is not None:
+            return self._prefetcher.frame_range
         return self._ranges.frame_range
 
     @property
     def is_new_frame_range(self):
         '''Whether the current frame is the first in a new range.'''
+        if self._prefetcher is not None:
+            return self._prefetcher.is_new_frame_range
         return self._ranges.is_new_frame_range
 
     @property
@@ -686,16 +1382,180 @@ class VideoReader(object):
         raise NotImplementedError("subclass must implement total_frame_count")
 
     def read(self):
-        raise NotImplementedError("subclass must implement read()")
+        '''Reads the next frame.
+
+        Returns:
+            img: the next frame
+
+        Raises:
+            StopIteration: if there are no more frames to process
+            VideoReaderError: if unable to load the next frame from file
+        '''
+        if self.prefetch > 0:
+            self._start_prefetching()
+            return self._prefetcher.read()
+
+        return self._read()
+
+    def read_batch(self, n):
+        '''Reads the next batch of frames into a single contiguous array.
+
+        Args:
+            n: the number of frames to read
+
+        Returns:
+            imgs: a [k, height, width, num_channels] array containing the next
+                k <= n frames. Only the last batch may contain fewer than n
+                frames
+            frame_numbers: a list of the k frame numbers in the batch
+
+        Raises:
+            StopIteration: if there are no more frames to process
+            VideoReaderError: if unable to load the next frame from file
+        '''
+        imgs = None
+        frame_numbers = []
+        for idx in range(n):
+            try:
+                img = self.read()
+            except StopIteration:
+                break
+            if imgs is None:
+                imgs = np.empty((n,) + img.shape, dtype=img.dtype)
+            imgs[idx] = img
+            frame_numbers.append(self.frame_number)
+
+        return _finalize_batch(imgs, frame_numbers)
+
+    def iter_batches(self, batch_size):
+        '''Returns a generator that reads the remaining frames in batches.
+
+        Args:
+            batch_size: the number of frames per batch
+
+        Returns:
+            a generator that emits (imgs, frame_numbers) tuples as returned
+                by `read_batch()`
+        '''
+        while True:
+            try:
+                yield self.read_batch(batch_size)
+            except StopIteration:
+                return
 
     def close(self):
-        raise NotImplementedError("subclass must implement close()")
+        '''Closes the video reader.
+
+        If frames are being prefetched, the background thread is stopped and
+        joined before the underlying video is closed.
+        '''
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+        self._close()
+
+    def _start_prefetching(self):
+        # Starts decoding frames in the background, if necessary
+        if self._prefetcher is None:
+            self._prefetcher = _FramePrefetcher(self, self.prefetch)
+
+    def _read(self):
+        raise NotImplementedError("subclass must implement _read()")
+
+    def _close(self):
+        raise NotImplementedError("subclass must implement _close()")
 
 
 class VideoReaderError(Exception):
     pass
 
 
+def _finalize_batch(imgs, frame_numbers):
+    # Trims a preallocated batch to the frames that were actually read
+    if not frame_numbers:
+        raise StopIteration
+    return imgs[:len(frame_numbers)], frame_numbers
+
+
+class _FramePrefetcher(object):
+    '''Decodes frames from a VideoReader in a background thread.
+
+    The thread pushes up to `prefetch` frames into a bounded queue along with
+    the frame number and frame range of each frame, so that the reader can
+    report the metadata of the frame that was most recently consumed rather
+    than that of the frame that was most recently decoded.
+    '''
+
+    # The interval, in seconds, at which a blocked thread checks whether it
+    # has been asked to stop
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, reader, prefetch):
+        self.frame_number = -1
+        self.frame_range = (-1, -1)
+        self.is_new_frame_range = False
+
+        self._reader = reader
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def read(self):
+        '''Returns the next prefetched frame.
+
+        Raises:
+            StopIteration: if there are no more frames to process
+            VideoReaderError: if unable to load the next frame from file
+        '''
+        if self._done:
+            raise StopIteration
+
+        item = self._queue.get()
+        if item[0] == "frame":
+            _, img, self.frame_number, self.frame_range, \
+                self.is_new_frame_range = item
+            return img
+
+        self._done = True
+        self._thread.join()
+        if item[0] == "error":
+            six.reraise(*item[1])
+        raise StopIteration
+
+    def close(self):
+        '''Stops and joins the background thread.'''
+        self._stop.set()
+        self._thread.join()
+        self._done = True
+
+    def _run(self):
+        ranges = self._reader._ranges
+        while not self._stop.is_set():
+            try:
+                img = self._reader._read()
+                item = (
+                    "frame", img, ranges.frame, ranges.frame_range,
+                    ranges.is_new_frame_range)
+            except StopIteration:
+                item = ("stop",)
+            except Exception:
+                item = ("error", sys.exc_info())
+
+            if not self._put(item) or item[0] != "frame":
+                return
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=self.POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+
 class FFmpegVideoReader(VideoReader):
     '''Class for reading video using ffmpeg.
 
@@ -704,12 +1564,80 @@ class FFmpegVideoReader(VideoReader):
     passed directly to ffmpeg.
 
     A frames string like "1-5,10-15" can optionally be passed to only read
-    certain frame ranges.
+    certain frame ranges. The requested ranges are compiled into an ffmpeg
+    `select` filter, so only the requested frames are converted to RGB and
+    piped out of ffmpeg.
+
+    By default, the video is decoded from the beginning and any frames that
+    precede the requested frames are decoded and discarded. When seek mode is
+    enabled, a new ffmpeg process is started whenever the next frame range
+    lies more than `SEEK_THRESHOLD` frames beyond the current decoding
+    position. The process uses an input-side `-ss` option, so ffmpeg jumps to
+    the nearest keyframe before the range and only decodes from there. The
+    seek position is computed from the frame rate of the video, so seek mode
+    assumes that the video has a constant frame rate.
+
+    Frames are read from the ffmpeg pipe directly into numpy arrays. In
+    zero-copy mode, the arrays are recycled from a preallocated ring of
+    `NUM_ZERO_COPY_BUFFERS` buffers and returned as read-only views, so no
+    memory is allocated per frame. A frame returned in this mode is only valid
+    until `NUM_ZERO_COPY_BUFFERS - 1` more frames have been read, so callers
+    that keep frames around must explicitly copy them via `img.copy()`.
+
+    An output `size` or `scale` can optionally be provided, in which case the
+    frames are resized inside ffmpeg, after any unwanted frames have been
+    discarded. This is much cheaper than resizing full resolution frames in
+    Python, since fewer bytes are converted and piped.
+
+    By default, frames are returned in RGB format. A different `pix_fmt` can
+    be requested when the caller consumes another format, which avoids color
+    conversions and reduces the number of bytes piped per frame:
+        "rgb24": [height, width, 3] RGB frames (the default)
+        "bgr24": [height, width, 3] BGR frames, as expected by OpenCV
+        "gray": [height, width] grayscale frames
+        "yuv420p": [3 * height / 2, width] frames whose rows contain the
+            stacked Y, U, and V planes. See `etai.split_yuv420p()`
+
+    When prefetching is enabled, frames are decoded in a background thread
+    while the caller processes the previous frames. In zero-copy mode, the
+    ring of buffers is enlarged by `prefetch + 1` so that the above guarantee
+    still holds.
+
+    If the video has a DecodedFrameCache in its default location, or at the
+    provided `frame_cache_path`, that contains the requested frames in the
+    requested size and pixel format, the frames are read from the
+    memory-mapped cache rather than decoded by ffmpeg. In zero-copy mode, the
+    returned frames are read-only views into the cache, which remain valid
+    indefinitely.
 
     This class uses 1-based indexing for all frame operations.
     '''
 
-    def __init__(self, inpath, frames=None):
+    # The number of preallocated frame buffers used in zero-copy mode
+    NUM_ZERO_COPY_BUFFERS = 4
+
+    # The minimum number of frames that must separate the current decoding
+    # position from the next frame range in order to seek rather than decode
+    # through the gap
+    SEEK_THRESHOLD = 64
+
+    # The number of seconds before each seek target at which ffmpeg starts
+    # decoding, which absorbs imprecise seeking in some containers
+    SEEK_MARGIN = 2.0
+
+    # The supported pixel formats of the frames
+    PIX_FMTS = ("rgb24", "bgr24", "gray", "yuv420p")
+
+    # The maximum number of frame ranges that are compiled into a single
+    # ffmpeg `select` filter. Beyond this, the command line would grow too
+    # long, so the unwanted frames are discarded in Python instead
+    MAX_SELECT_RANGES = 1000
+
+    def __init__(
+            self, inpath, frames=None, seek=False, zero_copy=False,
+            prefetch=0, size=None, scale=None, interpolation="bicubic",
+            pix_fmt="rgb24", frame_index=None, use_frame_cache=True,
+            frame_cache_path=None):
         '''Constructs a new VideoReader with ffmpeg backend.
 
         Args:
@@ -724,19 +1652,78 @@ class FFmpegVideoReader(VideoReader):
                     - a string like "1-3,6,8-10"
                     - a list like [1, 2, 3, 6, 8, 9, 10]
                     - a FrameRange or FrameRanges instance
+            seek: whether to seek to the nearest keyframe before each frame
+                range rather than decoding the video from the beginning. This
+                is much faster when sparse frames of a long video are
+                requested. By default, this is False
+            zero_copy: whether to return read-only views into a ring of
+                preallocated frame buffers rather than newly allocated
+                frames. By default, this is False
+            prefetch: the number of frames to decode ahead of the caller in a
+                background thread. By default, this is 0 (no prefetching)
+            size: an optional (width, height) to which to resize the frames.
+                One dimension can be -1, in which case the aspect ratio of the
+                video is preserved
+            scale: an optional factor by which to resize the frames. Only one
+                of `size` and `scale` can be provided
+            interpolation: the ffmpeg scaling algorithm to use when resizing
+                frames, e.g., "bilinear", "bicubic", "area", or "lanczos". By
+                default, "bicubic" is used
+            pix_fmt: the pixel format of the frames, which must be one of
+                `PIX_FMTS`. By default, "rgb24" is used
+            frame_index: an optional FrameIndex for the video. When provided
+                in seek mode, the exact timestamps and keyframes of the index
+                are used to seek, rather than assuming a constant frame rate
+            use_frame_cache: whether to read the frames from the
+                DecodedFrameCache of the video, if a suitable one exists. By
+                default, this is True
+            frame_cache_path: an optional path to the `.npy` file of a
+                DecodedFrameCache of the video, such as one generated by a
+                pipeline module. By default, the cache in the default location
+                of the video is used, if any
+
+        Raises:
+            VideoReaderError: if both `size` and `scale` are provided, or if
+                the pixel format is not supported by the frame size
         '''
+        if size is not None and scale is not None:
+            raise VideoReaderError(
+                "Only one of size and scale can be provided")
+        if pix_fmt not in self.PIX_FMTS:
+            raise VideoReaderError("Unsupported pix_fmt '%s'" % pix_fmt)
+
         self._stream_info = VideoStreamInfo.build_for(inpath)
-        self._ffmpeg = FFmpeg(
-            out_opts=[
-                "-f", 'image2pipe',         # pipe frames to stdout
-                "-vcodec", "rawvideo",      # output will be raw video
-                "-pix_fmt", "rgb24",        # pixel format
-            ],
-        )
-        self._ffmpeg.run(inpath, "-")
-        self._raw_frame = None
+        self._out_size = _get_output_frame_size(
+            self._stream_info.frame_size, size, scale)
+        self._interpolation = interpolation
+        self._pix_fmt = pix_fmt
+        self._seek = seek
+        self._frame_index = frame_index
+        self._zero_copy = zero_copy
+        self._ffmpeg = None
+        self._stream_frame = 0
+        self._is_selecting = False
+        self._buffers = []
+        self._buffer_idx = -1
+        self._skip_buffer = None
+
+        super(FFmpegVideoReader, self).__init__(
+            inpath, frames, prefetch=prefetch)
+
+        if pix_fmt == "yuv420p" and any(d % 2 for d in self.frame_size):
+            raise VideoReaderError(
+                "pix_fmt 'yuv420p' requires even frame dimensions; found "
+                "%dx%d" % self.frame_size)
 
-        super(FFmpegVideoReader, self).__init__(inpath, frames)
+        self._frame_cache_path = frame_cache_path
+        self._frame_cache = None
+        if use_frame_cache:
+            self._frame_cache = self._load_frame_cache()
+
+        if self._frame_cache is not None:
+            self._segments = []
+        else:
+            self._segments = self._make_segments()
 
     @property
     def encoding_str(self):
@@ -745,8 +1732,10 @@ class FFmpegVideoReader(VideoReader):
 
     @property
     def frame_size(self):
-        '''The (width, height) of each frame.'''
-        return self._stream_info.frame_size
+        '''The (width, height) of each frame. If the frames are being resized,
+        this is the output size.
+        '''
+        return self._out_size or self._stream_info.frame_size
 
     @property
     def frame_rate(self):
@@ -760,42 +1749,258 @@ class FFmpegVideoReader(VideoReader):
         '''
         return self._stream_info.total_frame_count
 
-    def read(self):
-        '''Reads the next frame.
+    def _read(self, buf=None):
+        frame = next(self._ranges)
+        if self._frame_cache is not None:
+            return self._read_cached(frame, buf=buf)
+        if self._segments and frame == self._segments[0][0][0]:
+            self._open_stream(self._segments.pop(0))
+        if self._is_selecting:
+            # ffmpeg only pipes the requested frames
+            self._stream_frame = frame - 1
+        for _ in range(self._stream_frame, frame - 1):
+            self._grab(self._get_skip_buffer())
+        return self._retrieve(buf=buf)
+
+    def read_batch(self, n):
+        '''Reads the next batch of frames into a single contiguous array.
+
+        When frames are not being prefetched, each frame is piped from ffmpeg
+        directly into its slot of the batch array.
+
+        Args:
+            n: the number of frames to read
 
         Returns:
-            img: the next frame
+            imgs: a [k, ...] array containing the next k <= n frames. Only
+                the last batch may contain fewer than n frames
+            frame_numbers: a list of the k frame numbers in the batch
 
         Raises:
             StopIteration: if there are no more frames to process
             VideoReaderError: if unable to load the next frame from file
         '''
-        for _ in range(max(0, self.frame_number), next(self._ranges)):
-            if not self._grab():
-                raise VideoReaderError(
-                    "Failed to grab frame %d" % self.frame_number)
-        return self._retrieve()
-
-    def close(self):
-        '''Closes the video reader.'''
-        self._ffmpeg.close()
+        if self.prefetch > 0:
+            return super(FFmpegVideoReader, self).read_batch(n)
 
-    def _grab(self):
-        try:
-            width, height = self.frame_size
-            self._raw_frame = self._ffmpeg.read(width * height * 3)
+        imgs = np.empty((n,) + self._frame_shape, dtype=np.uint8)
+        frame_numbers = []
+        for img in imgs:
+            try:
+                self._read(buf=img)
+            except StopIteration:
+                break
+            frame_numbers.append(self.frame_number)
+
+        return _finalize_batch(imgs, frame_numbers)
+
+    def _close(self):
+        self._close_stream()
+
+    def _load_frame_cache(self):
+        # Returns the DecodedFrameCache of the video, if it contains the
+        # requested frames in the requested size and pixel format
+        if self._frame_cache_path:
+            cache = DecodedFrameCache.load(
+                self._frame_cache_path, self.inpath)
+        else:
+            cache = DecodedFrameCache.load_for(self.inpath)
+        if cache is None:
+            return None
+        if cache.pix_fmt != self._pix_fmt:
+            return None
+        if cache.frame_size != tuple(self.frame_size):
+            return None
+        if not cache.has_frames(self._ranges.intervals.to_array()):
+            return None
+
+        logger.debug(
+            "Reading frames of '%s' from decoded frame cache '%s'",
+            self.inpath, cache.path)
+        return cache
+
+    def _read_cached(self, frame, buf=None):
+        img = self._frame_cache.get_frame(frame)
+        if buf is not None:
+            buf[...] = img
+            return buf
+        if self._zero_copy:
+            return img
+        return np.array(img)
+
+    def _make_segments(self):
+        # Partitions the frame ranges into the segments that are each served
+        # by a single ffmpeg process
+        ranges = self._ranges.ranges
+        if not self._seek:
+            return [ranges]
+
+        segments = []
+        last = None
+        for r in ranges:
+            if last is None or (
+                    r[0] - last > self.SEEK_THRESHOLD and
+                    self._has_keyframe_between(last, r[0])):
+                segments.append([])
+            segments[-1].append(r)
+            last = r[1]
+
+        return segments
+
+    def _has_keyframe_between(self, last, first):
+        # Whether seeking from frame `last` to frame `first` would skip any
+        # decoding. This is assumed to be the case unless a frame index shows
+        # that both frames share a keyframe
+        if self._frame_index is None:
             return True
-        except Exception:
-            return False
+        return self._frame_index.get_keyframe(first) > last
+
+    def _open_stream(self, ranges):
+        self._close_stream()
 
-    def _retrieve(self):
+        in_opts = []
+        filters = []
+        first = ranges[0][0]
+        if self._seek and first > 1 and self._frame_index is not None:
+            # Seek to the keyframe that precedes the first frame and trim
+            # the frames between them, using the exact timestamps recorded in
+            # the frame index. The trim start is negative when the first
+            # frame is the keyframe itself
+            target = self._frame_index.get_seek_time(first)
+            start = self._frame_index.get_keyframe_seek_time(first)
+            in_opts = ["-noaccurate_seek", "-ss", "%.6f" % start]
+            filters.append(
+                "trim=start=%.6f,setpts=PTS-STARTPTS" % (target - start))
+            self._stream_frame = first - 1
+        elif self._seek and first > 1 and self.frame_rate > 0:
+            # We target the midpoint between the desired frame and its
+            # predecessor so that timestamp rounding cannot shift the first
+            # frame. ffmpeg seeks to a point `SEEK_MARGIN` seconds earlier
+            # and the remaining frames are trimmed in the filtergraph, which
+            # keeps the numbering exact even for containers whose seeking is
+            # imprecise (e.g., MPEG-PS may land on the following keyframe)
+            target = (first - 1.5) / self.frame_rate
+            start = max(0.0, target - self.SEEK_MARGIN)
+            in_opts = ["-ss", "%.6f" % start]
+            filters.append(
+                "trim=start=%.6f,setpts=PTS-STARTPTS" % (target - start))
+            self._stream_frame = first - 1
+        else:
+            self._stream_frame = 0
+
+        # Only pipe the requested frames, when possible. Note that the frame
+        # counter `n` of the select filter is 0-based and relative to the
+        # first frame that enters it
+        offset = self._stream_frame + 1
+        self._is_selecting = (
+            (ranges[0][0] > offset or len(ranges) > 1) and
+            len(ranges) <= self.MAX_SELECT_RANGES)
+        if self._is_selecting:
+            filters.append("select='%s'" % "+".join(
+                "between(n,%d,%d)" % (f - offset, l - offset)
+                for f, l in ranges))
+            num_frames = sum(l - f + 1 for f, l in ranges)
+        else:
+            num_frames = ranges[-1][1] - self._stream_frame
+
+        if self._out_size:
+            # Only the requested frames are resized
+            filters.append("scale=%d:%d:flags=%s" % (
+                self._out_size + (self._interpolation,)))
+
+        out_opts = ["-vf", ",".join(filters)] if filters else []
+        if self._is_selecting:
+            # Don't duplicate/drop frames
+            out_opts += get_ffmpeg_passthrough_opts()
+        out_opts += [
+            "-frames:v", str(num_frames),  # stop after the last frame
+            "-f", 'image2pipe',         # pipe frames to stdout
+            "-vcodec", "rawvideo",      # output will be raw video
+            "-pix_fmt", self._pix_fmt,  # pixel format
+        ]
+
+        self._ffmpeg = FFmpeg(in_opts=in_opts, out_opts=out_opts)
+        self._ffmpeg.run(self.inpath, "-")
+        self._ffmpeg.set_output_pipe_size(
+            int(np.prod(self._frame_shape)))
+
+    def _close_stream(self):
+        if self._ffmpeg is not None:
+            self._ffmpeg.close()
+            self._ffmpeg = None
+
+    @property
+    def _frame_shape(self):
+        return _get_frame_shape(self.frame_size, self._pix_fmt)
+
+    def _get_skip_buffer(self):
+        if self._skip_buffer is None:
+            self._skip_buffer = np.empty(self._frame_shape, dtype=np.uint8)
+        return self._skip_buffer
+
+    def _get_frame_buffer(self):
+        if not self._zero_copy:
+            return np.empty(self._frame_shape, dtype=np.uint8)
+
+        if not self._buffers:
+            # Frames that are waiting in the prefetch queue, plus the frame
+            # that is being decoded, must not be overwritten either
+            num_buffers = self.NUM_ZERO_COPY_BUFFERS
+            if self.prefetch > 0:
+                num_buffers += self.prefetch + 1
+            self._buffers = [
+                np.empty(self._frame_shape, dtype=np.uint8)
+                for _ in range(num_buffers)]
+        self._buffer_idx = (self._buffer_idx + 1) % len(self._buffers)
+        return self._buffers[self._buffer_idx]
+
+    def _grab(self, buf):
         try:
-            vec = np.fromstring(self._raw_frame, dtype="uint8")
-            width, height = self.frame_size
-            return vec.reshape((height, width, 3))
-        except ValueError:
+            num_bytes = self._ffmpeg.read_into(buf.reshape(-1))
+        except Exception:
+            num_bytes = -1
+        if num_bytes != buf.nbytes:
             raise VideoReaderError(
-                "Unable to parse frame %d" % self.frame_number)
+                "Failed to grab frame %d" % (self._stream_frame + 1))
+        self._stream_frame += 1
+
+    def _retrieve(self, buf=None):
+        if buf is not None:
+            self._grab(buf)
+            return buf
+
+        img = self._get_frame_buffer()
+        self._grab(img)
+        if self._zero_copy:
+            # Prevent callers from modifying the recycled buffer
+            img = img.view()
+            img.flags.writeable = False
+        return img
+
+
+def _get_output_frame_size(frame_size, size, scale):
+    # Returns the concrete output (width, height) of a reader, or None if the
+    # frames are not being resized
+    if size is not None:
+        out_size = etai.infer_missing_dims(size, frame_size)
+    elif scale is not None:
+        out_size = etai.scale_frame_size(frame_size, scale)
+    else:
+        return None
+
+    return tuple(out_size) if tuple(out_size) != tuple(frame_size) else None
+
+
+def _get_frame_shape(frame_size, pix_fmt):
+    # Returns the shape of the arrays of frames of the given (width, height)
+    # in the given pixel format
+    width, height = frame_size
+    if pix_fmt == "gray":
+        return height, width
+    if pix_fmt == "yuv420p":
+        # The Y, U, and V planes, stacked vertically
+        return height * 3 // 2, width
+    return height, width, 3
 
 
 class OpenCVVideoReader(VideoReader):
@@ -812,7 +2017,7 @@ class OpenCVVideoReader(VideoReader):
     This class uses 1-based indexing for all frame operations.
     '''
 
-    def __init__(self, inpath, frames=None):
+    def __init__(self, inpath, frames=None, prefetch=0):
         '''Constructs a new VideoReader with OpenCV backend.
 
         Args:
@@ -827,6 +2032,8 @@ class OpenCVVideoReader(VideoReader):
                     - a string like "1-3,6,8-10"
                     - a list like [1, 2, 3, 6, 8, 9, 10]
                     - a FrameRange or FrameRanges instance
+            prefetch: the number of frames to decode ahead of the caller in a
+                background thread. By default, this is 0 (no prefetching)
 
         Raises:
             VideoReaderError: if the input video could not be opened.
@@ -835,7 +2042,8 @@ class OpenCVVideoReader(VideoReader):
         if not self._cap.isOpened():
             raise VideoReaderError("Unable to open '%s'" % inpath)
 
-        super(OpenCVVideoReader, self).__init__(inpath, frames)
+        super(OpenCVVideoReader, self).__init__(
+            inpath, frames, prefetch=prefetch)
 
     @property
     def encoding_str(self):
@@ -884,25 +2092,992 @@ class OpenCVVideoReader(VideoReader):
             # OpenCV 2
             return int(self._cap.get(cv2.cv.CV_CAP_PROP_FRAME_COUNT))
 
-    def read(self):
-        '''Reads the next frame.
+    def _read(self):
+        for idx in range(max(0, self._ranges.frame), next(self._ranges)):
+            if not self._cap.grab():
+                raise VideoReaderError(
+                    "Failed to grab frame %d" % (idx + 1))
+        return etai.bgr_to_rgb(self._cap.retrieve()[1])
+
+    def _close(self):
+        self._cap.release()
+
+
+class ParallelVideoReader(VideoReader):
+    '''Class for reading a video by decoding segments of it in parallel.
+
+    The requested frames are partitioned into `num_segments` contiguous
+    segments of roughly equal size whose boundaries are aligned to keyframes
+    of the video. Each segment is decoded by its own FFmpegVideoReader in seek
+    mode, i.e., by its own ffmpeg process.
+
+    The frames can be read in order via `read()` or iteration, in which case
+    up to `max_workers` segments are decoded concurrently, each up to
+    `prefetch` frames ahead of the caller. Alternatively, `map()` passes the
+    reader for each segment to a function that is run by a pool of
+    `max_workers` threads, so that the frames and the per-frame work of all
+    segments are processed in parallel.
+
+    In both cases, frame numbers refer to the entire video. Note that a frame
+    range that spans a segment boundary is split between the segment readers
+    that are passed to `map()`.
+
+    This class uses 1-based indexing for all frame operations.
+    '''
+
+    def __init__(
+            self, inpath, frames=None, num_segments=None, max_workers=None,
+            prefetch=16, **kwargs):
+        '''Constructs a new ParallelVideoReader.
+
+        Args:
+            inpath: path to the input video
+            frames: one of the following optional quantities specifying a
+                collection of frames to process:
+                    - None (all frames - the default)
+                    - "*" (all frames)
+                    - a string like "1-3,6,8-10"
+                    - a list like [1, 2, 3, 6, 8, 9, 10]
+                    - a FrameRange or FrameRanges instance
+            num_segments: the number of segments in which to decode the video.
+                By default, `max_workers` is used
+            max_workers: the maximum number of segments to decode
+                concurrently. By default, the number of CPUs is used
+            prefetch: the number of frames that each segment reader decodes
+                ahead of the caller when frames are read in order. By
+                default, this is 16
+            **kwargs: optional keyword arguments for FFmpegVideoReader, such
+                as `size`, `scale`, `pix_fmt`, or `zero_copy`
+        '''
+        self._stream_info = VideoStreamInfo.build_for(inpath)
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.num_segments = num_segments or self.max_workers
+
+        super(ParallelVideoReader, self).__init__(inpath, frames)
+
+        self._segment_ranges = self._make_segments()
+        self._readers = [
+            FFmpegVideoReader(
+                inpath, frames=FrameRanges(ranges), seek=True,
+                prefetch=prefetch, **kwargs)
+            for ranges in self._segment_ranges]
+        self._reader_idx = 0
+
+    @property
+    def encoding_str(self):
+        '''Return the video encoding string.'''
+        return self._stream_info.encoding_str
+
+    @property
+    def frame_size(self):
+        '''The (width, height) of each frame.'''
+        if self._readers:
+            return self._readers[0].frame_size
+        return self._stream_info.frame_size
+
+    @property
+    def frame_rate(self):
+        '''The frame rate.'''
+        return self._stream_info.frame_rate
+
+    @property
+    def total_frame_count(self):
+        '''The total number of frames in the video, or 0 if it could not be
+        determined.
+        '''
+        return self._stream_info.total_frame_count
+
+    @property
+    def segments(self):
+        '''A list of FrameRanges describing the frames of each segment.'''
+        return [FrameRanges(ranges) for ranges in self._segment_ranges]
+
+    def map(self, fcn):
+        '''Applies the function to the reader of each segment in parallel.
+
+        The function is called in a pool of `max_workers` threads. Since the
+        frames are decoded by ffmpeg subprocesses, the decoding of all
+        segments proceeds in parallel regardless of the GIL; the function
+        itself runs in parallel to the extent that it releases the GIL, as
+        numpy, OpenCV, and TensorFlow do.
+
+        The segment readers are closed when the function returns, so this
+        method consumes the reader.
+
+        Args:
+            fcn: a function that accepts the FFmpegVideoReader for a segment
+                and returns a result
+
+        Returns:
+            a list containing the result for each segment, in order
+        '''
+        def _process_segment(reader):
+            with reader:
+                return fcn(reader)
+
+        pool = ThreadPool(min(self.max_workers, max(len(self._readers), 1)))
+        try:
+            return pool.map(_process_segment, self._readers, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _make_segments(self):
+        # Partitions the requested frames into segments with roughly equal
+        # numbers of frames whose boundaries lie on keyframes
+        ranges = self._ranges.ranges
+        if not ranges:
+            return []
+
+        try:
+            keyframes = np.array(get_keyframe_numbers(self.inpath))
+        except FFprobeError:
+            logger.warning(
+                "Unable to find keyframes of '%s'; segments will not be "
+                "aligned to keyframes", self.inpath)
+            keyframes = None
+
+        frames = self._ranges.intervals.to_array()
+        cuts = set()
+        for idx in range(1, self.num_segments):
+            cut = int(frames[idx * len(frames) // self.num_segments])
+            if keyframes is not None and len(keyframes):
+                # Move the cut to the preceding keyframe, if any
+                kidx = np.searchsorted(keyframes, cut, side="right") - 1
+                if kidx >= 0:
+                    cut = int(keyframes[kidx])
+            if cut > frames[0]:
+                cuts.add(cut)
+
+        segments = [[]]
+        cuts = sorted(cuts)
+        for first, last in ranges:
+            while cuts and cuts[0] <= last:
+                cut = cuts.pop(0)
+                if cut > first:
+                    segments[-1].append((first, cut - 1))
+                    first = cut
+                if segments[-1]:
+                    segments.append([])
+            segments[-1].append((first, last))
+
+        return segments
+
+    def _read(self):
+        frame = next(self._ranges)
+        while frame > self._segment_ranges[self._reader_idx][-1][1]:
+            self._readers[self._reader_idx].close()
+            self._reader_idx += 1
+
+        # Keep up to `max_workers` segments decoding in the background
+        last_idx = min(
+            self._reader_idx + self.max_workers, len(self._readers))
+        for reader in self._readers[self._reader_idx:last_idx]:
+            if reader.prefetch > 0:
+                reader._start_prefetching()
+
+        reader = self._readers[self._reader_idx]
+        img = reader.read()
+        if reader.frame_number != frame:
+            raise VideoReaderError(
+                "Expected frame %d but segment reader returned frame %d" % (
+                    frame, reader.frame_number))
+        return img
+
+    def _close(self):
+        for reader in self._readers:
+            reader.close()
+
+
+class FrameIndex(object):
+    '''An index of the frames of a video.
+
+    The index records the presentation timestamp, keyframe flag, and packet
+    byte offset of every frame of the video, which allows the readers to seek
+    directly to the keyframe that precedes any frame, even for videos with
+    variable frame rates.
+
+    Building an index requires one `ffprobe -show_packets` pass over the
+    video, which demuxes the video without decoding it. Indexes can be
+    persisted in a cache directory as compact binary sidecar files via
+    `FrameIndex.build_for()`. The size and modification time of the video are
+    stored in the index, so stale indexes are rebuilt automatically.
+
+    This class uses 1-based indexing for all frame operations.
+    '''
+
+    # The version of the sidecar file format
+    VERSION = 1
+
+    def __init__(self, pts, keyframes, pkt_pos, time_base, size=-1, mtime=-1):
+        '''Constructs a FrameIndex.
+
+        Args:
+            pts: an array of the presentation timestamps of the frames, in
+                units of `time_base`
+            keyframes: a boolean array indicating which frames are keyframes
+            pkt_pos: an array of the byte offsets of the packets of the
+                frames, or -1 if unknown
+            time_base: the time base of the timestamps, in seconds
+            size: the size of the indexed video file, in bytes
+            mtime: the modification time of the indexed video file
+        '''
+        self.pts = np.asarray(pts, dtype=np.int64)
+        self.keyframes = np.asarray(keyframes, dtype=np.bool_)
+        self.pkt_pos = np.asarray(pkt_pos, dtype=np.int64)
+        self.time_base = time_base
+        self.size = size
+        self.mtime = mtime
+
+        self._keyframe_numbers = np.flatnonzero(self.keyframes) + 1
+
+    def __len__(self):
+        return len(self.pts)
+
+    @property
+    def num_frames(self):
+        '''The number of frames in the video.'''
+        return len(self.pts)
+
+    @property
+    def keyframe_numbers(self):
+        '''An array of the frame numbers of the keyframes.'''
+        return self._keyframe_numbers
+
+    def get_timestamp(self, frame_number):
+        '''Returns the timestamp of the given frame, in seconds, relative to
+        the first frame of the video.
+        '''
+        return float(self.pts[frame_number - 1] - self.pts[0]) * self.time_base
+
+    def get_seek_time(self, frame_number):
+        '''Returns a seek time, in seconds, that lies between the timestamps
+        of the given frame and its predecessor, so that timestamp rounding
+        cannot shift the frame.
+        '''
+        if frame_number <= 1:
+            return 0.0
+        return 0.5 * (
+            self.get_timestamp(frame_number - 1) +
+            self.get_timestamp(frame_number))
+
+    def get_keyframe(self, frame_number):
+        '''Returns the number of the last keyframe at or before the given
+        frame.
+        '''
+        idx = np.searchsorted(
+            self._keyframe_numbers, frame_number, side="right") - 1
+        return int(self._keyframe_numbers[idx]) if idx >= 0 else 1
+
+    def get_keyframe_seek_time(self, frame_number):
+        '''Returns a seek time, in seconds, at which ffmpeg starts reading
+        at the last keyframe at or before the given frame.
+
+        The time lies between the timestamps of the keyframe and its
+        successor, so that timestamp rounding cannot cause ffmpeg to start at
+        the preceding keyframe instead. Note that ffmpeg must be run with
+        `-noaccurate_seek`, or it would discard the keyframe itself.
+        '''
+        keyframe = self.get_keyframe(frame_number)
+        if keyframe < self.num_frames:
+            return self.get_seek_time(keyframe + 1)
+        if keyframe > 1:
+            # Extrapolate the interval after the last frame
+            return 1.5 * self.get_timestamp(keyframe) - 0.5 * (
+                self.get_timestamp(keyframe - 1))
+        return 0.0
+
+    def is_valid_for(self, inpath):
+        '''Whether the index is up-to-date for the given video file.'''
+        try:
+            st = os.stat(inpath)
+        except OSError:
+            return False
+        return self.size == st.st_size and self.mtime == st.st_mtime
+
+    def write(self, path):
+        '''Writes the index to disk in .npz format.'''
+        etau.ensure_basedir(path)
+        with open(path, "wb") as f:
+            np.savez(
+                f, version=self.VERSION, pts=self.pts,
+                keyframes=self.keyframes, pkt_pos=self.pkt_pos,
+                time_base=self.time_base, size=self.size, mtime=self.mtime)
+
+    @classmethod
+    def read(cls, path):
+        '''Reads a FrameIndex from disk.
+
+        Raises:
+            FrameIndexError: if the index was written by an incompatible
+                version of this class
+        '''
+        with np.load(path) as d:
+            if int(d["version"]) != cls.VERSION:
+                raise FrameIndexError(
+                    "Unsupported frame index version %d" % int(d["version"]))
+            return cls(
+                d["pts"], d["keyframes"], d["pkt_pos"], float(d["time_base"]),
+                size=int(d["size"]), mtime=float(d["mtime"]))
+
+    @classmethod
+    def build(cls, inpath):
+        '''Builds a FrameIndex for the given video using
+        `ffprobe -show_packets`.
+
+        Only the packets of the video are parsed, so no frames are decoded.
+        The packets are sorted by presentation timestamp, and the keyframe
+        flags of the packets identify the keyframes.
+
+        Raises:
+            FrameIndexError: if the video could not be indexed
+        '''
+        st = os.stat(inpath)
+        try:
+            num, denom = get_stream_info(inpath)["time_base"].split("/")
+            time_base = float(num) / float(denom)
+
+            ffprobe = FFprobe(opts=[
+                "-fflags", "+genpts",              # fill in missing PTS
+                "-select_streams", "v:0",          # only the video stream
+                "-show_entries", "packet=pts,dts,flags,pos",
+                "-print_format", "compact=print_section=0",
+            ])
+            out = ffprobe.run(inpath, decode=True)
+        except Exception as e:
+            raise FrameIndexError(
+                "Unable to index frames of '%s': %s" % (inpath, e))
+
+        pts = []
+        keyframes = []
+        pkt_pos = []
+        for line in out.splitlines():
+            if not line:
+                continue
+            d = dict(kv.split("=", 1) for kv in line.split("|") if "=" in kv)
+            ts = d.get("pts", "N/A")
+            if ts == "N/A":
+                ts = d.get("dts", "N/A")
+            pts.append(int(ts) if ts != "N/A" else None)
+            keyframes.append("K" in d.get("flags", ""))
+            pos = d.get("pos", "N/A")
+            pkt_pos.append(int(pos) if pos != "N/A" else -1)
+
+        if not pts or pts[0] is None:
+            raise FrameIndexError("No timestamped frames in '%s'" % inpath)
+
+        # Packets that lack a timestamp are extrapolated from the preceding
+        # packets
+        for idx in range(1, len(pts)):
+            if pts[idx] is None:
+                delta = pts[idx - 1] - pts[idx - 2] if idx > 1 else 1
+                pts[idx] = pts[idx - 1] + delta
+
+        # Packets are stored in decoding order, so we sort them into
+        # presentation order
+        order = np.argsort(pts, kind="mergesort")
+
+        return cls(
+            np.asarray(pts)[order], np.asarray(keyframes)[order],
+            np.asarray(pkt_pos)[order], time_base, size=st.st_size,
+            mtime=st.st_mtime)
+
+    @classmethod
+    def build_for(cls, inpath, cache_dir=None):
+        '''Loads the FrameIndex for the given video from its sidecar file,
+        building (and writing) it if the sidecar does not exist or is stale.
+
+        Args:
+            inpath: the video path
+            cache_dir: an optional directory in which to store the sidecar
+                file. By default, the `frame_index_cache_dir` ETA config
+                setting is used. If neither is set, the index is built
+                without being persisted
+
+        Returns:
+            a FrameIndex
+        '''
+        cache_dir = cache_dir or eta.config.frame_index_cache_dir
+        if not cache_dir:
+            return cls.build(inpath)
+
+        path = cls.get_sidecar_path(inpath, cache_dir)
+        if os.path.isfile(path):
+            try:
+                index = cls.read(path)
+                if index.is_valid_for(inpath):
+                    return index
+            except Exception as e:
+                logger.warning("Ignoring frame index '%s': %s", path, e)
+
+        index = cls.build(inpath)
+        try:
+            index.write(path)
+        except EnvironmentError as e:
+            logger.warning("Unable to write frame index '%s': %s", path, e)
+
+        return index
+
+    @staticmethod
+    def get_sidecar_path(inpath, cache_dir):
+        '''Returns the path of the sidecar file for the given video.
+
+        Args:
+            inpath: the video path
+            cache_dir: the cache directory
+
+        Returns:
+            the sidecar path
+        '''
+        key = hashlib.sha1(
+            os.path.realpath(inpath).encode("utf-8")).hexdigest()
+        return os.path.join(cache_dir, key + ".frames.npz")
+
+
+class FrameIndexError(Exception):
+    '''Exception raised when a FrameIndex could not be built or read.'''
+    pass
+
+
+class RandomAccessVideoReader(object):
+    '''Class for reading arbitrary frames of a video in any order.
+
+    The reader uses a FrameIndex of the video, so each requested frame is
+    decoded starting from the keyframe that precedes it rather than from the
+    beginning of the video. Nearby frames are decoded in a single pass.
+
+    This class uses 1-based indexing for all frame operations.
+    '''
+
+    def __init__(
+            self, inpath, frame_index=None, cache_dir=None, size=None,
+            scale=None, interpolation="bicubic", pix_fmt="rgb24"):
+        '''Constructs a RandomAccessVideoReader.
+
+        Args:
+            inpath: the video path
+            frame_index: an optional FrameIndex for the video. By default, the
+                index is loaded or built via `FrameIndex.build_for()`
+            cache_dir: an optional directory in which to store the frame
+                index. See `FrameIndex.build_for()` for the default
+            size: an optional (width, height) to which to resize the frames
+            scale: an optional factor by which to resize the frames
+            interpolation: the ffmpeg scaling algorithm to use when resizing
+                frames. By default, "bicubic" is used
+            pix_fmt: the pixel format of the frames. By default, "rgb24" is
+                used
+        '''
+        self.inpath = inpath
+        self.frame_index = frame_index or FrameIndex.build_for(
+            inpath, cache_dir=cache_dir)
+        self._reader_kwargs = {
+            "size": size,
+            "scale": scale,
+            "interpolation": interpolation,
+            "pix_fmt": pix_fmt,
+        }
+
+    def __len__(self):
+        return self.frame_index.num_frames
+
+    def __getitem__(self, frame_number):
+        '''Returns the given frame.
+
+        Raises:
+            IndexError: if the frame number is out of range
+        '''
+        return self.get_frames([frame_number])[0]
+
+    @property
+    def total_frame_count(self):
+        '''The total number of frames in the video.'''
+        return self.frame_index.num_frames
+
+    def get_frames(self, frame_numbers):
+        '''Returns the given frames.
+
+        Args:
+            frame_numbers: a list of frame numbers, in any order and possibly
+                with duplicates
+
+        Returns:
+            a list containing the requested frames, in the requested order
+
+        Raises:
+            IndexError: if any frame number is out of range
+        '''
+        for fn in frame_numbers:
+            if fn < 1 or fn > self.frame_index.num_frames:
+                raise IndexError("Frame %d is out of range" % fn)
+
+        frames = sorted(set(frame_numbers))
+        if not frames:
+            return []
+
+        imgs = {}
+        with FFmpegVideoReader(
+                self.inpath, frames=frames, seek=True,
+                frame_index=self.frame_index, **self._reader_kwargs) as r:
+            for img in r:
+                imgs[r.frame_number] = img
+
+        return [imgs[fn] for fn in frame_numbers]
+
+
+class DecodedFrameCache(object):
+    '''A cache of the decoded frames of a video, stored in a memory-mapped
+    array.
+
+    Decoding is often the dominant cost of the modules that consume a video,
+    and a pipeline may decode the same video in several modules. A
+    DecodedFrameCache decodes the video once into an uncompressed `.npy` file
+    containing a [num_frames, ...] uint8 array of the frames. A small JSON
+    header, stored next to the array with a ".json" extension, records the
+    frame numbers, frame rate, frame size, and pixel format of the frames,
+    along with the size and modification time of the video, so that stale
+    caches are ignored.
+
+    The frames are accessed via `np.memmap`, so concurrent consumers of a
+    cache share the page cache of the operating system rather than each
+    running ffmpeg. FFmpegVideoReader, and hence VideoProcessor, transparently
+    reads from the cache stored in the default location of a video, or from
+    the cache at an explicitly provided path, such as one generated by a
+    pipeline module, if it contains the requested frames in the requested size
+    and pixel format.
+
+    Caches are large (about 6MB per 1080p RGB frame), so they are only built
+    when explicitly requested via `DecodedFrameCache.build_for()`.
+
+    This class uses 1-based indexing for all frame operations.
+    '''
+
+    # The version of the cache format
+    VERSION = 1
+
+    def __init__(self, path):
+        '''Loads the DecodedFrameCache stored at the given path.
+
+        Args:
+            path: the path of the `.npy` file of the cache
+
+        Raises:
+            DecodedFrameCacheError: if the cache is missing or invalid
+        '''
+        self.path = path
+        try:
+            with open(self.get_header_path(path), "r") as f:
+                header = json.load(f)
+            if header["version"] != self.VERSION:
+                raise ValueError(
+                    "unsupported version %s" % header["version"])
+            self.frames = header["frames"]
+            self.frame_rate = header["frame_rate"]
+            self.frame_size = tuple(header["frame_size"])
+            self.pix_fmt = header["pix_fmt"]
+            self.size = header["size"]
+            self.mtime = header["mtime"]
+            self.images = np.load(path, mmap_mode="r")
+        except Exception as e:
+            raise DecodedFrameCacheError(
+                "Unable to load decoded frame cache '%s': %s" % (path, e))
+
+        # Guard against an array and a header written by different builds
+        self.frame_numbers = FrameIntervals.from_str(self.frames).to_array()
+        if len(self.images) != len(self.frame_numbers):
+            raise DecodedFrameCacheError(
+                "Decoded frame cache '%s' has %d frames but its header lists "
+                "%d" % (path, len(self.images), len(self.frame_numbers)))
+        frame_shape = _get_frame_shape(self.frame_size, self.pix_fmt)
+        if self.images.shape[1:] != frame_shape:
+            raise DecodedFrameCacheError(
+                "Decoded frame cache '%s' has frames of shape %s but its "
+                "header implies %s" % (
+                    path, self.images.shape[1:], frame_shape))
+
+    def __len__(self):
+        return len(self.frame_numbers)
+
+    def has_frames(self, frame_numbers):
+        '''Whether the cache contains all of the given frames.'''
+        frame_numbers = np.asarray(frame_numbers, dtype=np.int64)
+        if not self.frame_numbers.size:
+            return not frame_numbers.size
+        idx = np.searchsorted(self.frame_numbers, frame_numbers)
+        idx = np.minimum(idx, len(self.frame_numbers) - 1)
+        return bool(np.all(self.frame_numbers[idx] == frame_numbers))
+
+    def get_frame(self, frame_number):
+        '''Returns a read-only, memory-mapped view of the given frame.
+
+        Raises:
+            DecodedFrameCacheError: if the frame is not in the cache
+        '''
+        idx = np.searchsorted(self.frame_numbers, frame_number)
+        if (idx >= len(self.frame_numbers) or
+                self.frame_numbers[idx] != frame_number):
+            raise DecodedFrameCacheError(
+                "Frame %d is not in decoded frame cache '%s'" % (
+                    frame_number, self.path))
+        return self.images[idx]
+
+    def is_valid_for(self, inpath):
+        '''Whether the cache is up-to-date for the given video file.'''
+        try:
+            st = os.stat(inpath)
+        except OSError:
+            return False
+        return self.size == st.st_size and self.mtime == st.st_mtime
+
+    @classmethod
+    def build(
+            cls, inpath, path, frames=None, size=None, scale=None,
+            interpolation="bicubic", pix_fmt="rgb24"):
+        '''Decodes the given frames of a video into a DecodedFrameCache.
+
+        The cache is written to temporary files that are then renamed, so
+        concurrent readers never observe a partially written cache.
+
+        Args:
+            inpath: the video path
+            path: the path of the `.npy` file of the cache. The directory is
+                created if necessary
+            frames: an optional frames string or FrameRanges instance
+                specifying the frames to cache. By default, all frames are
+                cached
+            size: an optional (width, height) to which to resize the frames
+            scale: an optional factor by which to resize the frames
+            interpolation: the ffmpeg scaling algorithm to use when resizing
+                frames. By default, "bicubic" is used
+            pix_fmt: the pixel format of the frames, which must be one of
+                `FFmpegVideoReader.PIX_FMTS`. By default, "rgb24" is used
+
+        Returns:
+            a DecodedFrameCache
+        '''
+        st = os.stat(inpath)
+        etau.ensure_basedir(path)
+        dirname = os.path.dirname(path) or "."
+        with FFmpegVideoReader(
+                inpath, frames=frames, zero_copy=True, size=size,
+                scale=scale, interpolation=interpolation, pix_fmt=pix_fmt,
+                use_frame_cache=False) as r:
+            num_frames = len(FrameIntervals.from_str(r.frames))
+            header = {
+                "version": cls.VERSION,
+                "frames": r.frames,
+                "frame_rate": r.frame_rate,
+                "frame_size": list(r.frame_size),
+                "pix_fmt": pix_fmt,
+                "size": st.st_size,
+                "mtime": st.st_mtime,
+            }
+
+            # The header of any previous build is removed before its array
+            # is replaced, so that the two can never be mismatched
+            header_path = cls.get_header_path(path)
+            if os.path.isfile(header_path):
+                os.remove(header_path)
+
+            fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=dirname)
+            os.close(fd)
+            try:
+                images = np.lib.format.open_memmap(
+                    tmp_path, mode="w+", dtype=np.uint8,
+                    shape=(num_frames,) + r._frame_shape)
+                for idx, img in enumerate(r):
+                    images[idx] = img
+                images.flush()
+                del images
+                os.rename(tmp_path, path)
+            except Exception:
+                etau.delete_file(tmp_path)
+                raise
+
+        # The header is written last, since it marks the cache as complete
+        fd, tmp_path = tempfile.mkstemp(suffix=".json", dir=dirname)
+        with os.fdopen(fd, "w") as f:
+            json.dump(header, f)
+        os.rename(tmp_path, cls.get_header_path(path))
+
+        return cls(path)
+
+    @classmethod
+    def build_for(cls, inpath, cache_dir=None, **kwargs):
+        '''Builds a DecodedFrameCache for the given video in its default
+        location, unless an up-to-date cache with the requested frames, size,
+        and pixel format already exists.
+
+        Args:
+            inpath: the video path
+            cache_dir: an optional directory in which to store the cache. By
+                default, the cache is stored next to the video, which is the
+                location that FFmpegVideoReader checks
+            **kwargs: optional keyword arguments for `build()`
+
+        Returns:
+            a DecodedFrameCache
+        '''
+        path = cls.get_cache_path(inpath, cache_dir=cache_dir)
+        cache = cls.load_for(inpath, cache_dir=cache_dir)
+        if cache is not None:
+            pix_fmt = kwargs.get("pix_fmt", "rgb24")
+            with FFmpegVideoReader(
+                    inpath, frames=kwargs.get("frames", None),
+                    size=kwargs.get("size", None),
+                    scale=kwargs.get("scale", None), pix_fmt=pix_fmt,
+                    use_frame_cache=False) as r:
+                if (cache.frames == r.frames and
+                        cache.pix_fmt == pix_fmt and
+                        cache.frame_size == tuple(r.frame_size)):
+                    return cache
+
+        return cls.build(inpath, path, **kwargs)
+
+    @classmethod
+    def load_for(cls, inpath, cache_dir=None):
+        '''Loads the DecodedFrameCache of the given video, if an up-to-date
+        one exists.
+
+        Args:
+            inpath: the video path
+            cache_dir: an optional directory in which the cache is stored. By
+                default, the cache is assumed to be stored next to the video
+
+        Returns:
+            a DecodedFrameCache, or None if no up-to-date cache exists
+        '''
+        path = cls.get_cache_path(inpath, cache_dir=cache_dir)
+        return cls.load(path, inpath)
+
+    @classmethod
+    def load(cls, path, inpath):
+        '''Loads the DecodedFrameCache stored at the given path, if it exists
+        and is up-to-date for the given video.
+
+        Args:
+            path: the path of the `.npy` file of the cache
+            inpath: the video path
+
+        Returns:
+            a DecodedFrameCache, or None if no up-to-date cache exists
+        '''
+        if not os.path.isfile(cls.get_header_path(path)):
+            return None
+
+        try:
+            cache = cls(path)
+        except DecodedFrameCacheError as e:
+            logger.warning("Ignoring %s", e)
+            return None
+
+        return cache if cache.is_valid_for(inpath) else None
+
+    @staticmethod
+    def get_cache_path(inpath, cache_dir=None):
+        '''Returns the path of the `.npy` file of the cache of the given
+        video.
+
+        Args:
+            inpath: the video path
+            cache_dir: an optional cache directory. By default, the cache is
+                stored next to the video
+
+        Returns:
+            the cache path
+        '''
+        if cache_dir:
+            key = hashlib.sha1(
+                os.path.realpath(inpath).encode("utf-8")).hexdigest()
+            return os.path.join(cache_dir, key + ".decoded.npy")
+
+        return inpath + ".decoded.npy"
+
+    @staticmethod
+    def get_header_path(path):
+        '''Returns the path of the header of the cache with the given `.npy`
+        path.
+        '''
+        return os.path.splitext(path)[0] + ".json"
+
+
+class DecodedFrameCacheError(Exception):
+    '''Exception raised when a DecodedFrameCache could not be loaded.'''
+    pass
+
+
+# Output options used when re-encoding the partial GOPs of clips, by codec
+CLIP_ENCODER_OPTS = {
+    "h264": ["-preset", "fast", "-crf", "18"],
+    "hevc": ["-preset", "fast", "-crf", "20"],
+}
+
+# Output options used when re-encoding the partial GOPs of clips whose codec
+# does not appear in `CLIP_ENCODER_OPTS`
+DEFAULT_CLIP_ENCODER_OPTS = ["-q:v", "2"]
+
+# Bitstream filters that move the codec parameters of stream copied packets
+# in-band, by codec, so that clip parts can be concatenated
+_IN_BAND_PARAMS_BSFS = {
+    "h264": "h264_mp4toannexb",
+    "hevc": "hevc_mp4toannexb",
+}
+
+
+def extract_clips(inpath, frames, out_clips_path, frame_index=None,
+                  cache_dir=None):
+    '''Extracts clips of the given frame ranges of a video via
+    `extract_clip()`.
+
+    Args:
+        inpath: the input video path
+        frames: a frames string like "1-10,20-30" or a FrameRanges instance
+            specifying the clips to extract. If None, the entire video is
+            extracted as a single clip
+        out_clips_path: a path like "/path/to/video/%05d-%05d.mp4" with two
+            placeholders that specifies where to write the clip for each
+            frame range
+        frame_index: an optional FrameIndex for the video. By default, the
+            index is loaded or built via `FrameIndex.build_for()`
+        cache_dir: an optional directory in which to store the frame index.
+            See `FrameIndex.build_for()` for the default
+    '''
+    frame_index = frame_index or FrameIndex.build_for(
+        inpath, cache_dir=cache_dir)
+    if frames is None:
+        frames = "1-%d" % frame_index.num_frames
+    if not isinstance(frames, FrameRanges):
+        frames = FrameRanges.from_str(frames)
+
+    for first, last in frames.ranges:
+        extract_clip(
+            inpath, out_clips_path % (first, last), first, last,
+            frame_index=frame_index)
+
+
+def extract_clip(inpath, outpath, first, last, frame_index=None,
+                 cache_dir=None):
+    '''Extracts the given frames of a video into a new video.
+
+    The complete GOPs (groups of pictures) of the clip are extracted via
+    stream copy, without decoding them. Only the frames before the first
+    keyframe of the clip and after its last complete GOP are re-encoded, so
+    the clip contains exactly the requested frames at the cost of decoding at
+    most two GOPs. The partial GOPs are re-encoded with the codec and pixel
+    format of the input video using `CLIP_ENCODER_OPTS`.
 
-        Returns:
-            img: the next frame
+    The GOPs of the input video are assumed to be closed, which is the
+    default for most encoders. Only the video stream is extracted.
 
-        Raises:
-            StopIteration: if there are no more frames to process
-            VideoReaderError: if unable to load the next frame from file
-        '''
-        for idx in range(max(0, self.frame_number), next(self._ranges)):
-            if not self._cap.grab():
-                raise VideoReaderError(
-                    "Failed to grab frame %d" % (idx + 1))
-        return etai.bgr_to_rgb(self._cap.retrieve()[1])
+    Args:
+        inpath: the input video path
+        outpath: the output video path. Existing files are overwritten, and
+            the directory is created if necessary
+        first: the first frame of the clip
+        last: the last frame of the clip
+        frame_index: an optional FrameIndex for the video. By default, the
+            index is loaded or built via `FrameIndex.build_for()`
+        cache_dir: an optional directory in which to store the frame index.
+            See `FrameIndex.build_for()` for the default
 
-    def close(self):
-        '''Closes the video reader.'''
-        self._cap.release()
+    Raises:
+        FrameRangeError: if the frames are not in the video
+        ExecutableRuntimeError: if ffmpeg fails to extract the clip
+    '''
+    frame_index = frame_index or FrameIndex.build_for(
+        inpath, cache_dir=cache_dir)
+    num_frames = frame_index.num_frames
+    if first < 1 or last > num_frames or first > last:
+        raise FrameRangeError(
+            "Frames %d-%d are not in the %d frames of '%s'" % (
+                first, last, num_frames, inpath))
+
+    # The complete GOPs of the clip lie between GOP boundaries in
+    # [first, last + 1]
+    bounds = [
+        int(k) for k in frame_index.keyframe_numbers if first <= k <= last]
+    if last == num_frames:
+        bounds.append(num_frames + 1)
+    elif frame_index.keyframes[last]:
+        bounds.append(last + 1)
+
+    parts = []
+    if len(bounds) < 2:
+        parts.append((False, first, last))
+    else:
+        if first < bounds[0]:
+            parts.append((False, first, bounds[0] - 1))
+        parts.append((True, bounds[0], bounds[-1] - 1))
+        if bounds[-1] <= last:
+            parts.append((False, bounds[-1], last))
+
+    if len(parts) == 1:
+        _extract_clip_part(inpath, outpath, frame_index, *parts[0])
+        return
+
+    # The re-encoded and copied parts have different codec parameters, so
+    # the parts carry their parameters in-band and are then concatenated via
+    # stream copy
+    with etau.TempDir() as d:
+        list_path = os.path.join(d, "parts.txt")
+        with open(list_path, "w") as f:
+            for idx, part in enumerate(parts, 1):
+                part_path = os.path.join(d, "%d.mkv" % idx)
+                _extract_clip_part(
+                    inpath, part_path, frame_index, *part, in_band=True)
+
+                # Explicit durations ensure that the timestamps of the parts
+                # are contiguous regardless of their decoding delays
+                duration = _get_duration(frame_index, part[1], part[2])
+                f.write("file '%s'\nduration %.6f\n" % (part_path, duration))
+
+        ffmpeg = FFmpeg(
+            in_opts=["-f", "concat", "-safe", "0"],
+            out_opts=["-map", "0:v:0", "-c", "copy"])
+        ffmpeg.run(list_path, outpath)
+
+
+def _get_duration(frame_index, first, last):
+    # Returns the duration of the given frames, in seconds
+    if last < frame_index.num_frames:
+        end = frame_index.get_timestamp(last + 1)
+    else:
+        # Assume that the last frame lasts as long as its predecessor
+        end = 2 * frame_index.get_timestamp(last) - (
+            frame_index.get_timestamp(last - 1))
+    return end - frame_index.get_timestamp(first)
+
+
+def _extract_clip_part(
+        inpath, outpath, frame_index, copy, first, last, in_band=False):
+    info = get_stream_info(inpath)
+    codec = info["codec_name"]
+    num_frames = last - first + 1
+    if copy:
+        # Stream copy starts at the keyframe that precedes the seek time,
+        # which is the keyframe at `first`
+        seek_time = frame_index.get_keyframe_seek_time(first)
+        # Some containers, like MPEG-PS, omit the timestamps of some packets
+        in_opts = ["-fflags", "+genpts", "-ss", "%.6f" % seek_time]
+        out_opts = [
+            "-map", "0:v:0", "-c", "copy", "-avoid_negative_ts", "make_zero",
+            "-frames:v", str(num_frames)]
+        if in_band and codec in _IN_BAND_PARAMS_BSFS:
+            out_opts += ["-bsf:v", _IN_BAND_PARAMS_BSFS[codec]]
+    else:
+        # Decode from the keyframe that precedes `first` and trim the frames
+        # before `first`
+        seek_time = frame_index.get_keyframe_seek_time(first)
+        trim = "trim=start=%.6f,setpts=PTS-STARTPTS" % (
+            frame_index.get_seek_time(first) - seek_time)
+        in_opts = ["-noaccurate_seek", "-ss", "%.6f" % seek_time]
+        out_opts = [
+            "-map", "0:v:0", "-vf", trim, "-c:v", codec,
+            "-pix_fmt", info["pix_fmt"], "-frames:v", str(num_frames)]
+        out_opts += CLIP_ENCODER_OPTS.get(codec, DEFAULT_CLIP_ENCODER_OPTS)
+        if in_band:
+            out_opts += ["-bsf:v", "dump_extra"]
+
+    FFmpeg(in_opts=in_opts, out_opts=out_opts).run(inpath, outpath)
 
 
 class VideoWriter(object):
@@ -926,9 +3101,25 @@ class VideoWriterError(Exception):
 
 
 class FFmpegVideoWriter(VideoWriter):
-    '''Class for writing videos using ffmpeg.'''
+    '''Class for writing videos using ffmpeg.
+
+    Frames are passed to ffmpeg's stdin stream directly from their memory,
+    without first being serialized into bytes strings. By default, frames are
+    written by a background thread that consumes a bounded queue, so the
+    caller can continue producing frames while ffmpeg encodes. In this mode,
+    the images passed to `write()` must not be modified afterwards, since they
+    may not have been written yet.
+
+    Any errors raised by ffmpeg, such as encoder failures, are reported by
+    `close()`, along with ffmpeg's error output.
+    '''
+
+    # The default number of frames that can be queued for writing
+    DEFAULT_QUEUE_SIZE = 8
 
-    def __init__(self, outpath, fps, size, out_opts=None):
+    def __init__(
+            self, outpath, fps, size, out_opts=None, pix_fmt="rgb24",
+            queue_size=DEFAULT_QUEUE_SIZE):
         '''Constructs a VideoWriter with ffmpeg backend.
 
         Args:
@@ -937,35 +3128,233 @@ class FFmpegVideoWriter(VideoWriter):
             fps: the frame rate
             size: the (width, height) of each frame
             out_opts: an optional list of output options for FFmpeg
+            pix_fmt: the pixel format of the frames that will be written,
+                which can be any of `FFmpegVideoReader.PIX_FMTS`. By default,
+                "rgb24" is used
+            queue_size: the maximum number of frames that can be queued for
+                writing by the background writer thread. If 0, frames are
+                written synchronously by `write()`. The default is
+                `DEFAULT_QUEUE_SIZE`
         '''
         self.outpath = outpath
         self.fps = fps
         self.size = size
+        self.pix_fmt = pix_fmt
+        self.queue_size = queue_size
 
         self._ffmpeg = FFmpeg(
             in_opts=[
                 "-f", "rawvideo",           # input will be raw video
                 "-vcodec", "rawvideo",      # input will be raw video
                 "-s", "%dx%d" % self.size,  # frame size
-                "-pix_fmt", "rgb24",        # pixel format
+                "-pix_fmt", self.pix_fmt,   # pixel format
                 "-r", str(self.fps),        # frame rate
             ],
             out_opts=out_opts,
         )
         self._ffmpeg.run("-", self.outpath)
 
+        self._queue = None
+        self._thread = None
+        self._exc_info = None
+        if self.queue_size > 0:
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
     def write(self, img):
         '''Appends the image to the output video.
 
+        When frames are written asynchronously, the image must not be
+        modified after it is passed to this method.
+
         Args:
-            img: an image in ETA format (RGB)
+            img: an image in the writer's pixel format (RGB by default)
+
+        Raises:
+            ExecutableRuntimeError: if ffmpeg exited with an error
         '''
-        self._ffmpeg.stream(img.tostring())
+        buf = memoryview(np.ascontiguousarray(img, dtype=np.uint8).reshape(-1))
+        if self._queue is None:
+            self._ffmpeg.stream(buf)
+            return
+
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+        self._queue.put(buf)
 
     def close(self):
-        '''Closes the video writer.'''
+        '''Closes the video writer, waiting for any queued frames to be
+        written.
+
+        Raises:
+            ExecutableRuntimeError: if ffmpeg exited with an error
+        '''
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
         self._ffmpeg.close()
 
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+
+    def _run(self):
+        while True:
+            buf = self._queue.get()
+            if buf is None:
+                break
+            if self._exc_info is not None:
+                continue  # discard frames so that write() never blocks
+
+            try:
+                self._ffmpeg.stream(buf)
+            except Exception:
+                self._exc_info = sys.exc_info()
+
+
+class FFmpegVideoClipsWriter(FFmpegVideoWriter):
+    '''Class for writing a sequence of video clips using a single ffmpeg
+    process.
+
+    The frames of all clips are encoded as one stream, with keyframes forced
+    at the first frame of each clip, and ffmpeg's segment muxer splits the
+    stream into the clips. This avoids starting a new ffmpeg process for each
+    clip, which dominates the runtime when writing many short clips.
+
+    The clips are written to a temporary directory next to the output clips,
+    so that they can be renamed rather than copied to their output paths when
+    the writer is closed.
+    '''
+
+    def __init__(
+            self, out_clips_path, fps, size, frame_ranges, out_opts=None,
+            pix_fmt="rgb24", queue_size=FFmpegVideoWriter.DEFAULT_QUEUE_SIZE):
+        '''Constructs a VideoClipsWriter with ffmpeg backend.
+
+        Args:
+            out_clips_path: a path like "/path/to/video/%05d-%05d.mp4" with
+                two placeholders that specifies where to write the clip for
+                each frame range
+            fps: the frame rate
+            size: the (width, height) of each frame
+            frame_ranges: a list of (first, last) tuples, or a FrameRanges
+                instance, specifying the frame ranges of the clips. Exactly
+                one frame must be written per frame of each range
+            out_opts: an optional list of output options for FFmpeg. By
+                default, `FFmpeg.DEFAULT_VIDEO_OUT_OPTS` is used
+            pix_fmt: the pixel format of the frames that will be written. By
+                default, "rgb24" is used
+            queue_size: the maximum number of frames that can be queued for
+                writing. See FFmpegVideoWriter
+        '''
+        if isinstance(frame_ranges, FrameRanges):
+            frame_ranges = frame_ranges.ranges
+
+        self.out_clips_path = out_clips_path
+        self.frame_ranges = [tuple(r) for r in frame_ranges]
+        self._clip_starts = list(np.cumsum(
+            [0] + [last - first + 1 for first, last in self.frame_ranges]))
+        self._next_clip = 0
+        self._num_written = 0
+
+        # Keyframes are forced halfway before the first frame of each clip so
+        # that timestamp rounding cannot shift them
+        starts = self._clip_starts[1:-1]
+        segment_opts = ["-f", "segment", "-reset_timestamps", "1"]
+        if starts:
+            segment_opts += [
+                "-force_key_frames",
+                ",".join("%.6f" % ((n - 0.5) / fps) for n in starts),
+                "-segment_frames", ",".join(str(n) for n in starts)]
+
+        # The temporary directory is on the filesystem of the output clips
+        out_dir = os.path.dirname(
+            out_clips_path % self.frame_ranges[0] if self.frame_ranges
+            else out_clips_path)
+        etau.ensure_dir(out_dir)
+        self._tmp_dir = tempfile.mkdtemp(dir=out_dir or ".", prefix=".clips-")
+        ext = os.path.splitext(out_clips_path)[1]
+        self._segment_patt = os.path.join(self._tmp_dir, "%d" + ext)
+
+        out_opts = (out_opts or FFmpeg.DEFAULT_VIDEO_OUT_OPTS) + segment_opts
+        super(FFmpegVideoClipsWriter, self).__init__(
+            self._segment_patt, fps, size, out_opts=out_opts, pix_fmt=pix_fmt,
+            queue_size=queue_size)
+
+    def start_clip(self, frame_range):
+        '''Declares that the following frames belong to the clip for the
+        given frame range.
+
+        Calling this method is optional, since the clip boundaries are known
+        in advance, but it validates that the expected number of frames were
+        written to the previous clips.
+
+        Args:
+            frame_range: the (first, last) tuple of the clip
+
+        Raises:
+            VideoWriterError: if the frame range is not the next clip, or if
+                the wrong number of frames were written to the previous clip
+        '''
+        idx = self._next_clip
+        if idx >= len(self.frame_ranges) or (
+                tuple(frame_range) != tuple(self.frame_ranges[idx])):
+            raise VideoWriterError(
+                "Expected the next clip to be %s, not %s" % (
+                    self.frame_ranges[idx] if idx < len(self.frame_ranges)
+                    else None, frame_range))
+        if self._num_written != self._clip_starts[idx]:
+            raise VideoWriterError(
+                "Clip %d-%d must start at output frame %d, but %d frames "
+                "have been written" % (
+                    frame_range[0], frame_range[1], self._clip_starts[idx],
+                    self._num_written))
+        self._next_clip += 1
+
+    def write(self, img):
+        '''Appends the image to the current clip.
+
+        Args:
+            img: an image in the writer's pixel format (RGB by default)
+        '''
+        super(FFmpegVideoClipsWriter, self).write(img)
+        self._num_written += 1
+
+    def close(self):
+        '''Closes the writer and moves the clips to their output paths.
+
+        Only the clips to which frames were written are generated.
+
+        Raises:
+            VideoWriterError: if ffmpeg did not generate exactly one segment
+                per clip to which frames were written
+        '''
+        try:
+            super(FFmpegVideoClipsWriter, self).close()
+
+            num_clips = sum(
+                1 for n in self._clip_starts[:-1] if n < self._num_written)
+            segment_paths = [
+                self._segment_patt % idx for idx in range(num_clips)]
+            missing = [
+                self.frame_ranges[idx]
+                for idx, path in enumerate(segment_paths)
+                if not os.path.isfile(path)]
+            num_segments = len(os.listdir(self._tmp_dir))
+            if missing or num_segments != num_clips:
+                raise VideoWriterError(
+                    "Expected ffmpeg to write %d clips, but found %d "
+                    "segments; missing clips: %s" % (
+                        num_clips, num_segments, missing))
+
+            for path, frame_range in zip(segment_paths, self.frame_ranges):
+                etau.move_file(path, self.out_clips_path % frame_range)
+        finally:
+            etau.delete_dir(self._tmp_dir)
+
 
 class OpenCVVideoWriter(VideoWriter):
     '''Class for writing videos using cv2.VideoWriter.
@@ -1199,12 +3588,23 @@ class FFmpeg(object):
     def stream(self, string):
         '''Writes the string to ffmpeg's stdin stream.
 
+        Args:
+            string: a bytes-like object to write, such as a bytes string or a
+                memoryview of a C-contiguous numpy array
+
         Raises:
             FFmpegStreamingError: if input streaming mode is not active
+            ExecutableRuntimeError: if ffmpeg exited before consuming the
+                string
         '''
         if not self.is_input_streaming:
             raise FFmpegStreamingError("Not currently input streaming")
-        self._p.stdin.write(string)
+        try:
+            self._p.stdin.write(string)
+        except IOError:
+            # ffmpeg closed its stdin stream, so report why it exited
+            raise etau.ExecutableRuntimeError(
+                self.cmd, self._p.stderr.read())
 
     def read(self, num_bytes):
         '''Reads the given number of bytes from ffmpeg's stdout stream.
@@ -1216,23 +3616,92 @@ class FFmpeg(object):
             raise FFmpegStreamingError("Not currently output streaming")
         return self._p.stdout.read(num_bytes)
 
+    def read_into(self, buf):
+        '''Reads bytes from ffmpeg's stdout stream into the given buffer until
+        it is full or the stream ends.
+
+        Args:
+            buf: a writable, 1D byte buffer to fill, such as a flattened uint8
+                numpy array
+
+        Returns:
+            the number of bytes read
+
+        Raises:
+            FFmpegStreamingError: if output streaming mode is not active
+        '''
+        if not self.is_output_streaming:
+            raise FFmpegStreamingError("Not currently output streaming")
+
+        view = memoryview(buf)
+        num_bytes = len(view)
+        num_read = 0
+        while num_read < num_bytes:
+            n = self._p.stdout.readinto(view[num_read:])
+            if not n:
+                break
+            num_read += n
+
+        return num_read
+
+    def set_output_pipe_size(self, num_bytes):
+        '''Attempts to enlarge the pipe from which ffmpeg's stdout stream is
+        read, which reduces the number of context switches required to read
+        large frames.
+
+        The pipe size is capped at the system limit. This method only has an
+        effect on Linux.
+
+        Args:
+            num_bytes: the desired pipe size, in bytes
+
+        Raises:
+            FFmpegStreamingError: if output streaming mode is not active
+        '''
+        if not self.is_output_streaming:
+            raise FFmpegStreamingError("Not currently output streaming")
+        _set_pipe_size(self._p.stdout, num_bytes)
+
     def close(self):
         '''Closes a streaming ffmpeg program.
 
+        When input streaming to an output file, ffmpeg is expected to exit
+        cleanly once its stdin stream is closed, so a nonzero exit code is
+        reported as an error. Output streaming programs may be closed before
+        ffmpeg has finished writing, so their exit codes are ignored.
+
         Raises:
             FFmpegStreamingError: if a streaming mode is not active
+            ExecutableRuntimeError: if ffmpeg exited with an error while input
+                streaming to an output file
         '''
         if not (self.is_input_streaming or self.is_output_streaming):
             raise FFmpegStreamingError("Not currently streaming")
-        self._p.stdin.close()
+        try:
+            self._p.stdin.close()
+        except IOError:
+            pass  # ffmpeg already exited; its error is reported below
         self._p.stdout.close()
+        err = self._p.stderr.read()
+        self._p.stderr.close()
         self._p.wait()
+
+        check_error = self.is_input_streaming and not self.is_output_streaming
+        returncode = self._p.returncode
         self._p = None
         self.is_input_streaming = False
         self.is_output_streaming = False
 
+        if check_error and returncode != 0:
+            raise etau.ExecutableRuntimeError(self.cmd, err)
+
     @staticmethod
     def _gen_filter_opts(fps, size, scale):
+        filters = FFmpeg._gen_filters(fps, size, scale)
+        return ["-vf", ",".join(filters)] if filters else []
+
+    @staticmethod
+    def _gen_filters(fps, size, scale):
         filters = []
         if fps is not None and fps > 0:
             filters.append("fps={0}".format(fps))
@@ -1240,13 +3709,132 @@ class FFmpeg(object):
             filters.append("scale={0}:{1}".format(*size))
         elif scale:
             filters.append("scale=iw*{0}:ih*{0}".format(scale))
-        return ["-vf", ",".join(filters)] if filters else []
+        return filters
+
+
+def transcode_renditions(inpath, renditions, global_opts=None, in_opts=None):
+    '''Transcodes a video into multiple renditions using a single ffmpeg
+    process.
+
+    The input video is decoded once, and its frames are passed to the
+    renditions via ffmpeg's `split` filter, so generating N renditions is
+    much cheaper than N separate `FFmpeg.run()` calls.
+
+    Args:
+        inpath: the input video path
+        renditions: a list of dicts describing the renditions to generate.
+            Each dict must contain an "outpath" key and can contain "fps",
+            "size", "scale", and "out_opts" keys, which have the same meaning
+            as the corresponding arguments of FFmpeg
+        global_opts: an optional list of global options for ffmpeg. By
+            default, `FFmpeg.DEFAULT_GLOBAL_OPTS` is used
+        in_opts: an optional list of input options for ffmpeg
+
+    Raises:
+        ExecutableNotFoundError: if the ffmpeg binary cannot be found
+        ExecutableRuntimeError: if the ffmpeg binary raises an error during
+            execution
+    '''
+    labels = ["[s%d]" % idx for idx in range(len(renditions))]
+    graph = ["[0:v]split=%d%s" % (len(renditions), "".join(labels))]
+    out_args = []
+    for idx, rendition in enumerate(renditions):
+        outpath = rendition["outpath"]
+        filters = FFmpeg._gen_filters(
+            rendition.get("fps"), rendition.get("size"),
+            rendition.get("scale")) or ["null"]
+        graph.append("%s%s[o%d]" % (labels[idx], ",".join(filters), idx))
+
+        out_args += ["-map", "[o%d]" % idx]
+        out_opts = rendition.get("out_opts")
+        if is_supported_video_file(outpath):
+            # Audio, if any, is passed through unless the options disable it
+            out_args += ["-map", "0:a?"]
+            if out_opts is None:
+                out_opts = FFmpeg.DEFAULT_VIDEO_OUT_OPTS
+        out_args += (out_opts or []) + [outpath]
+        etau.ensure_path(outpath)
+
+    args = (
+        ["ffmpeg"] + (global_opts or FFmpeg.DEFAULT_GLOBAL_OPTS) +
+        (in_opts or []) + ["-i", inpath] +
+        ["-filter_complex", ";".join(graph)] + out_args
+    )
+    cmd = " ".join(args)
+
+    try:
+        logger.debug("Executing '%s'" % cmd)
+        p = Popen(args, stdin=PIPE, stdout=PIPE, stderr=PIPE)
+    except EnvironmentError as e:
+        if e.errno == errno.ENOENT:
+            raise etau.ExecutableNotFoundError("ffmpeg")
+        else:
+            raise
+
+    err = p.communicate()[1]
+    if p.returncode != 0:
+        raise etau.ExecutableRuntimeError(cmd, err)
+
+
+# The output options of `get_ffmpeg_passthrough_opts()`, which are cached
+# after the version of ffmpeg is first checked
+_FFMPEG_PASSTHROUGH_OPTS = None
+
+
+def get_ffmpeg_passthrough_opts():
+    '''Returns the ffmpeg output options that pass frames through with their
+    timestamps, without duplicating or dropping any frames.
+
+    ffmpeg 5.1 replaced the `-vsync` option with `-fps_mode`, and newer
+    versions warn that `-vsync` is deprecated, so the options are chosen based
+    on the version of the ffmpeg binary. Development builds, whose versions
+    are not numbered, are assumed to support `-fps_mode`.
+
+    Returns:
+        a list of output options
+    '''
+    global _FFMPEG_PASSTHROUGH_OPTS
+    if _FFMPEG_PASSTHROUGH_OPTS is None:
+        try:
+            out = etau.communicate_or_die(
+                ["ffmpeg", "-version"], decode=True)
+            m = re.search(r"version n?(\d+)\.(\d+)", out)
+            use_fps_mode = (
+                m is None or (int(m.group(1)), int(m.group(2))) >= (5, 1))
+        except (etau.ExecutableNotFoundError, etau.ExecutableRuntimeError):
+            use_fps_mode = False
+
+        if use_fps_mode:
+            _FFMPEG_PASSTHROUGH_OPTS = ["-fps_mode", "passthrough"]
+        else:
+            _FFMPEG_PASSTHROUGH_OPTS = ["-vsync", "0"]
+
+    return list(_FFMPEG_PASSTHROUGH_OPTS)
 
 
 class FFmpegStreamingError(Exception):
     pass
 
 
+# The fcntl command for resizing a pipe on Linux, which is only exposed by the
+# fcntl module in Python 3.10+
+_F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+
+_PIPE_MAX_SIZE_PATH = "/proc/sys/fs/pipe-max-size"
+
+
+def _set_pipe_size(pipe, num_bytes):
+    if not sys.platform.startswith("linux"):
+        return
+
+    try:
+        with open(_PIPE_MAX_SIZE_PATH, "rt") as f:
+            num_bytes = min(num_bytes, int(f.read()))
+        fcntl.fcntl(pipe.fileno(), _F_SETPIPE_SZ, num_bytes)
+    except (IOError, OSError, ValueError):
+        logger.debug("Unable to resize pipe to %d bytes", num_bytes)
+
+
 class FOURCC(object):
     '''Class reprsesenting a FOURCC code.'''
 
@@ -1288,29 +3876,354 @@ class FOURCC(object):
                chr((i & 0xFF000000) >> 24)
 
 
+class FrameIntervals(object):
+    '''An immutable set of frames stored as sorted arrays of disjoint
+    (first, last) intervals, inclusive.
+
+    Membership queries are O(log n) in the number of intervals, and the set
+    operations (union, intersection, difference, dilation, erosion) are
+    vectorized over the intervals rather than the frames, so they remain
+    cheap on long videos.
+
+    Adjacent intervals like (1, 3) and (4, 6) are preserved as given, since
+    they may describe distinct clips. The results of set operations are always
+    canonical, i.e., adjacent and overlapping intervals are merged.
+    '''
+
+    def __init__(self, firsts=None, lasts=None):
+        '''Constructs a FrameIntervals instance from arrays of first and last
+        frames, which must describe disjoint intervals in increasing order.
+
+        Args:
+            firsts: an optional array-like of first frames of each interval
+            lasts: an optional array-like of last frames of each interval
+
+        Raises:
+            FrameRangeError: if an interval has last < first
+            FrameRangesError: if the intervals are not disjoint and
+                monotonically increasing
+        '''
+        self._firsts = _to_frames_array(firsts)
+        self._lasts = _to_frames_array(lasts)
+        if self._firsts.shape != self._lasts.shape:
+            raise FrameRangesError(
+                "Expected the same number of firsts (%d) and lasts (%d)" % (
+                    self._firsts.size, self._lasts.size))
+
+        bad = np.flatnonzero(self._lasts < self._firsts)
+        if bad.size:
+            raise FrameRangeError(
+                "Expected first:%d <= last:%d" % (
+                    self._firsts[bad[0]], self._lasts[bad[0]]))
+
+        bad = np.flatnonzero(self._firsts[1:] <= self._lasts[:-1])
+        if bad.size:
+            raise FrameRangesError(
+                "Expected first:%d > last:%d" % (
+                    self._firsts[bad[0] + 1], self._lasts[bad[0]]))
+
+        self._firsts.flags.writeable = False
+        self._lasts.flags.writeable = False
+        self._num_frames = int(np.sum(self._lasts - self._firsts + 1))
+
+    def __str__(self):
+        return self.to_str()
+
+    def __repr__(self):
+        return "%s('%s')" % (self.__class__.__name__, self.to_str())
+
+    def __len__(self):
+        return self._num_frames
+
+    def __contains__(self, frame):
+        return self.contains(frame)
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(
+            map(range, self._firsts.tolist(), (self._lasts + 1).tolist()))
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, FrameIntervals) and
+            np.array_equal(self._firsts, other._firsts) and
+            np.array_equal(self._lasts, other._lasts))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self._firsts.tobytes(), self._lasts.tobytes()))
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        return self.difference(other)
+
+    @property
+    def firsts(self):
+        '''A read-only array of the first frames of each interval.'''
+        return self._firsts
+
+    @property
+    def lasts(self):
+        '''A read-only array of the last frames of each interval.'''
+        return self._lasts
+
+    @property
+    def num_intervals(self):
+        '''The number of intervals in the set.'''
+        return self._firsts.size
+
+    @property
+    def ranges(self):
+        '''A list of (first, last) tuples describing the intervals.'''
+        return list(zip(self._firsts.tolist(), self._lasts.tolist()))
+
+    def contains(self, frames):
+        '''Determines whether the given frame(s) are in the set.
+
+        Args:
+            frames: a frame number or an array-like of frame numbers
+
+        Returns:
+            a bool, or a boolean array with the shape of `frames`
+        '''
+        frames = np.asarray(frames)
+        idx = np.searchsorted(self._firsts, frames, side="right") - 1
+        if self._lasts.size:
+            found = (idx >= 0) & (frames <= self._lasts[np.maximum(idx, 0)])
+        else:
+            found = np.zeros(frames.shape, dtype=bool)
+        return bool(found) if found.ndim == 0 else found
+
+    def union(self, other):
+        '''Returns the union of this set and another FrameIntervals.'''
+        return self._combine(other, np.logical_or)
+
+    def intersection(self, other):
+        '''Returns the intersection of this set and another FrameIntervals.'''
+        return self._combine(other, np.logical_and)
+
+    def difference(self, other):
+        '''Returns the frames in this set that are not in another
+        FrameIntervals.
+        '''
+        return self._combine(other, lambda a, b: a & ~b)
+
+    def merged(self):
+        '''Returns the canonical form of this set, in which adjacent intervals
+        are merged.
+        '''
+        return self._combine(FrameIntervals(), np.logical_or)
+
+    def dilate(self, num_frames, max_frame=None):
+        '''Returns a copy of this set in which each interval is grown by the
+        given number of frames on each side.
+
+        Args:
+            num_frames: the number of frames by which to grow each interval
+            max_frame: an optional maximum frame number, e.g., the total frame
+                count of the video, at which to clip the intervals. The
+                intervals are always clipped at frame 1
+
+        Returns:
+            a FrameIntervals instance
+        '''
+        firsts = np.maximum(self._firsts - num_frames, 1)
+        lasts = self._lasts + num_frames
+        if max_frame is not None:
+            lasts = np.minimum(lasts, max_frame)
+        keep = lasts >= firsts
+        return FrameIntervals._from_unsorted(firsts[keep], lasts[keep])
+
+    def erode(self, num_frames):
+        '''Returns a copy of this set in which each interval is shrunk by the
+        given number of frames on each side. Intervals that vanish are
+        removed.
+
+        Adjacent intervals are merged before eroding, so the result depends
+        only on the frames in the set; e.g., both "1-3,4-6" and "1-6" erode
+        by one frame to "2-5".
+
+        Args:
+            num_frames: the number of frames by which to shrink each interval
+
+        Returns:
+            a FrameIntervals instance
+        '''
+        merged = self.merged()
+        firsts = merged._firsts + num_frames
+        lasts = merged._lasts - num_frames
+        keep = lasts >= firsts
+        return FrameIntervals(firsts[keep], lasts[keep])
+
+    def to_array(self):
+        '''Returns an array of the frames in the set.'''
+        if not self._num_frames:
+            return np.zeros(0, dtype=np.int64)
+
+        # Each frame is one more than the previous, except at the start of an
+        # interval, where it jumps by the gap from the previous interval
+        steps = np.ones(self._num_frames, dtype=np.int64)
+        starts = np.cumsum(self._lasts[:-1] - self._firsts[:-1] + 1)
+        steps[0] = self._firsts[0]
+        steps[starts] = self._firsts[1:] - self._lasts[:-1]
+        return np.cumsum(steps)
+
+    def to_list(self):
+        '''Returns a list of the frames in the set.'''
+        return self.to_array().tolist()
+
+    def to_str(self):
+        '''Returns a frames string like "1-3,6,8-10" describing the set.'''
+        return ",".join(
+            "%d" % first if first == last else "%d-%d" % (first, last)
+            for first, last in self.ranges)
+
+    def to_event_series(self):
+        '''Returns an EventSeries with an Event for each interval.'''
+        return etae.EventSeries(
+            events=[etae.Event(first, last) for first, last in self.ranges])
+
+    @classmethod
+    def from_ranges(cls, ranges):
+        '''Constructs a FrameIntervals instance from a list of (first, last)
+        tuples, which must be disjoint and monotonically increasing.
+
+        Raises:
+            FrameRangeError: if a range has last < first
+            FrameRangesError: if the ranges are not disjoint and monotonically
+                increasing
+        '''
+        ranges = np.asarray(list(ranges), dtype=np.int64).reshape(-1, 2)
+        return cls(ranges[:, 0], ranges[:, 1])
+
+    @classmethod
+    def from_str(cls, frames_str):
+        '''Constructs a FrameIntervals instance from a frames string.
+
+        Args:
+            frames_str: a string like "1-3,6,8-10"
+
+        Raises:
+            FrameRangeError: if a range in the frames string is invalid
+            FrameRangesError: if the frames string is invalid
+        '''
+        ranges = []
+        for r in frames_str.split(","):
+            if r:
+                fr = FrameRange.from_str(r)
+                ranges.append((fr.first, fr.last))
+
+        return cls.from_ranges(ranges)
+
+    @classmethod
+    def from_frames(cls, frames):
+        '''Constructs a FrameIntervals instance from an array-like of frame
+        numbers, in any order and possibly with duplicates.
+        '''
+        frames = np.unique(_to_frames_array(frames))
+        if not frames.size:
+            return cls()
+
+        breaks = np.flatnonzero(np.diff(frames) > 1)
+        firsts = frames[np.concatenate([[0], breaks + 1])]
+        lasts = frames[np.concatenate([breaks, [frames.size - 1]])]
+        return cls(firsts, lasts)
+
+    @classmethod
+    def from_event_series(cls, series):
+        '''Constructs a FrameIntervals instance from an EventSeries, whose
+        events may be in any order and may overlap.
+        '''
+        return cls._from_unsorted(
+            [e.start for e in series.events], [e.stop for e in series.events])
+
+    @classmethod
+    def _from_unsorted(cls, firsts, lasts):
+        # Builds the canonical set covered by possibly overlapping intervals
+        firsts = _to_frames_array(firsts)
+        lasts = _to_frames_array(lasts)
+        return _combine_intervals([(firsts, lasts)], lambda c: c[0])
+
+    def _combine(self, other, op):
+        return _combine_intervals(
+            [(self._firsts, self._lasts), (other._firsts, other._lasts)],
+            lambda c: op(c[0], c[1]))
+
+
+def _to_frames_array(frames):
+    if frames is None:
+        return np.zeros(0, dtype=np.int64)
+
+    return np.array(frames, dtype=np.int64).ravel()
+
+
+def _combine_intervals(sets, op):
+    # Sweeps over the interval boundaries of each set, tracking whether each
+    # set covers the frames between consecutive boundaries, and returns the
+    # canonical FrameIntervals of the frames for which `op` holds
+    positions = []
+    deltas = []
+    for idx, (firsts, lasts) in enumerate(sets):
+        delta = np.zeros((2 * firsts.size, len(sets)), dtype=np.int64)
+        delta[:firsts.size, idx] = 1
+        delta[firsts.size:, idx] = -1
+        positions.append(np.concatenate([firsts, lasts + 1]))
+        deltas.append(delta)
+
+    positions = np.concatenate(positions)
+    if not positions.size:
+        return FrameIntervals()
+
+    order = np.argsort(positions, kind="mergesort")
+    positions = positions[order]
+    counts = np.cumsum(np.concatenate(deltas)[order], axis=0)
+
+    # Keep the coverage after the last event at each boundary
+    last = np.append(positions[1:] != positions[:-1], True)
+    positions = positions[last]
+    counts = counts[last]
+
+    mask = op([counts[:, idx] > 0 for idx in range(len(sets))])
+    edges = np.diff(np.concatenate([[False], mask]).astype(np.int8))
+    firsts = positions[edges == 1]
+    lasts = positions[edges == -1] - 1
+    return FrameIntervals(firsts, lasts)
+
+
 class FrameRanges(object):
-    '''A monotonically increasing and disjoint series of frames.'''
+    '''A monotonically increasing and disjoint series of frames.
+
+    FrameRanges is an iterator over the frames of a FrameIntervals instance
+    that also tracks the range containing the current frame.
+    '''
 
     def __init__(self, ranges):
         '''Constructs a frame range series from a list of (first, last) tuples,
-        which must be disjoint and monotonically increasing.
+        which must be disjoint and monotonically increasing, or from a
+        FrameIntervals instance.
 
         Raises:
             FrameRangesError: if the series is not disjoint and monotonically
                 increasing
         '''
+        if not isinstance(ranges, FrameIntervals):
+            ranges = FrameIntervals.from_ranges(ranges)
+
+        self._intervals = ranges
+        self._firsts = ranges.firsts.tolist()
+        self._lasts = ranges.lasts.tolist()
         self._idx = 0
-        self._ranges = []
+        self._frame = -1
         self._started = False
 
-        end = -1
-        for first, last in ranges:
-            if first <= end:
-                raise FrameRangesError(
-                    "Expected first:%d > last:%d" % (first, end))
-
-            self._ranges.append(FrameRange(first, last))
-            end = last
+    def __str__(self):
+        return self.to_str()
 
     def __iter__(self):
         return self
@@ -1321,24 +4234,28 @@ class FrameRanges(object):
         Raises:
             StopIteration: if there are no more frames to process
         '''
-        self._started = True
-        try:
-            frame = next(self._ranges[self._idx])
-        except StopIteration:
+        if not self._started:
+            if not self._firsts:
+                raise StopIteration
+
+            self._started = True
+            self._frame = self._firsts[0]
+        elif self._frame < self._lasts[self._idx]:
+            self._frame += 1
+        elif self._idx + 1 < len(self._firsts):
             self._idx += 1
-            return next(self)
-        except IndexError:
+            self._frame = self._firsts[self._idx]
+        else:
+            # Remain on the last frame so that the current frame is still
+            # available after the series is exhausted
             raise StopIteration
 
-        return frame
+        return self._frame
 
     @property
     def frame(self):
         '''The current frame number, or -1 if no frames have been read.'''
-        if self._started:
-            return self._ranges[self._idx].idx
-
-        return -1
+        return self._frame
 
     @property
     def frame_range(self):
@@ -1346,7 +4263,7 @@ class FrameRanges(object):
         frames have been read.
         '''
         if self._started:
-            return self._ranges[self._idx].first, self._ranges[self._idx].last
+            return self._firsts[self._idx], self._lasts[self._idx]
 
         return (-1, -1)
 
@@ -1354,21 +4271,27 @@ class FrameRanges(object):
     def is_new_frame_range(self):
         '''Whether the current frame is the first in a new range.'''
         if self._started:
-            return self._ranges[self._idx].is_first_frame
+            return self._frame == self._firsts[self._idx]
 
         return False
 
+    @property
+    def intervals(self):
+        '''The FrameIntervals describing the frame ranges.'''
+        return self._intervals
+
+    @property
+    def ranges(self):
+        '''A list of (first, last) tuples describing the frame ranges.'''
+        return self._intervals.ranges
+
     def to_list(self):
         '''Return a list of frames in the frame ranges.'''
-        frames = []
-        for r in self._ranges:
-            frames += r.to_list()
-
-        return frames
+        return self._intervals.to_list()
 
     def to_str(self):
         '''Return a string representation of the frame ranges.'''
-        return ",".join([r.to_str() for r in self._ranges])
+        return self._intervals.to_str()
 
     @classmethod
     def from_str(cls, frames_str):
@@ -1380,13 +4303,7 @@ class FrameRanges(object):
         Raises:
             FrameRangesError: if the frames string is invalid
         '''
-        ranges = []
-        for r in frames_str.split(','):
-            if r:
-                fr = FrameRange.from_str(r)
-                ranges.append((fr.first, fr.last))
-
-        return cls(ranges)
+        return cls(FrameIntervals.from_str(frames_str))
 
     @classmethod
     def from_list(cls, frames_list):
@@ -1398,7 +4315,7 @@ class FrameRanges(object):
         Raises:
             FrameRangesError: if the frames list is invalid
         '''
-        return cls(_list_to_ranges(frames_list))
+        return cls(FrameIntervals.from_frames(frames_list))
 
 
 class FrameRangesError(Exception):
@@ -1485,7 +4402,7 @@ class FrameRange(object):
         Raises:
             FrameRangeError: if the frame range list is invalid
         '''
-        ranges = list(_list_to_ranges(frames_list))
+        ranges = FrameIntervals.from_frames(frames_list).ranges
         if len(ranges) != 1:
             raise FrameRangeError("Invalid frame range list %s" % frames_list)
 
@@ -1495,19 +4412,3 @@ class FrameRange(object):
 class FrameRangeError(Exception):
     '''Exception raised when an invalid FrameRange is encountered.'''
     pass
-
-
-def _list_to_ranges(vals):
-    if not vals:
-        raise StopIteration
-
-    vals = sorted(vals)
-    first = last = vals[0]
-    for val in vals[1:]:
-        if val == last + 1:
-            last += 1
-        else:
-            yield (first, last)
-            first = last = val
-
-    yield (first, last)
@@ -27,11 +27,18 @@ from builtins import *
 # pragma pylint: enable=wildcard-import
 
 import os
-import shutil
-from zipfile import ZipFile
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
 
 
-def make_zip(zip_path):
+# Extensions of media files whose contents are already compressed, so
+# deflating them again costs time for little or no size reduction
+COMPRESSED_MEDIA_EXTS = {
+    ".mp4", ".m4v", ".mov", ".avi", ".mkv", ".webm", ".flv", ".wmv", ".mpg",
+    ".mpeg", ".jpg", ".jpeg", ".png", ".gif", ".mp3", ".aac", ".zip",
+}
+
+
+def make_zip(zip_path, store_media=False):
     '''Makes the given zip file by zipping the directory of the same base name.
 
     For example, if zip_path is `/path/to/dir.zip`, the created zip file will
@@ -39,10 +46,26 @@ def make_zip(zip_path):
 
     Args:
         zip_path: the output zip file path
+        store_media: whether to store files whose extensions are in
+            `COMPRESSED_MEDIA_EXTS` without compression. By default, all files
+            are compressed
     '''
     outpath = os.path.splitext(zip_path)[0]
-    rootdir, basedir = os.path.split(outpath)
-    shutil.make_archive(outpath, "zip", rootdir, basedir)
+    rootdir = os.path.dirname(outpath)
+    with ZipFile(zip_path, "w", ZIP_DEFLATED) as zf:
+        for dirpath, dirnames, filenames in os.walk(outpath):
+            dirnames.sort()
+            zf.write(dirpath, os.path.relpath(dirpath, rootdir))
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                ext = os.path.splitext(filename)[1].lower()
+                if store_media and ext in COMPRESSED_MEDIA_EXTS:
+                    compress_type = ZIP_STORED
+                else:
+                    compress_type = ZIP_DEFLATED
+                zf.write(
+                    path, os.path.relpath(path, rootdir),
+                    compress_type=compress_type)
 
 
 def extract_zip(zip_path):
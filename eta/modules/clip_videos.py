@@ -19,6 +19,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 from builtins import *
+from future.utils import iteritems
 # pragma pylint: enable=redefined-builtin
 # pragma pylint: enable=unused-wildcard-import
 # pragma pylint: enable=wildcard-import
@@ -26,10 +27,11 @@ from builtins import *
 import logging
 import sys
 
-from eta.core.config import Config
+from eta.core.config import Config, ConfigError
 import eta.core.events as etae
 import eta.core.image as etai
 import eta.core.module as etam
+import eta.core.utils as etau
 import eta.core.video as etav
 
 
@@ -52,12 +54,19 @@ class ClipConfig(etam.BaseModuleConfig):
         self._validate()
 
     def _validate(self):
+        # Each input must specify exactly one way to choose its clips
         for data in self.data:
-            Config.parse_mutually_exclusive_fields({
+            sources = [k for k, v in iteritems({
                 "event_detection_path": data.event_detection_path,
                 "event_series_path": data.event_series_path,
                 "frames": self.parameters.frames,
-            })
+                "sample_method": self.parameters.sample_method,
+            }) if v]
+            if len(sources) != 1:
+                raise ConfigError(
+                    "Expected exactly one of event_detection_path, "
+                    "event_series_path, frames, and sample_method to be "
+                    "specified, but found %d: %s" % (len(sources), sources))
 
 
 class DataConfig(Config):
@@ -108,16 +117,37 @@ class ParametersConfig(Config):
     Parameters:
         frames (eta.core.types.String): [None] A frames string specifying the
             clips to generate
+        stream_copy (eta.core.types.Boolean): [True] Whether to generate video
+            clips via stream copy, re-encoding only the partial GOPs at the
+            boundaries of each clip, rather than re-encoding every frame
+        sample_method (eta.core.types.String): [None] An optional adaptive
+            frame sampling method, "scene" or "keyframes", with which to
+            choose the frames. Only one of frames, sample_method, and the
+            events of the data can be provided. See
+            `eta.core.video.adaptively_sample_frames()`
+        scene_threshold (eta.core.types.Number): [0.3] The scene change score
+            above which frames are sampled when the sample method is "scene"
+        min_spacing (eta.core.types.Number): [None] An optional minimum number
+            of frames between adaptively sampled frames
+        max_spacing (eta.core.types.Number): [None] An optional maximum number
+            of frames between adaptively sampled frames
     '''
 
     def __init__(self, d):
         self.frames = self.parse_string(d, "frames", default=None)
+        self.stream_copy = self.parse_bool(d, "stream_copy", default=True)
+        self.sample_method = self.parse_string(
+            d, "sample_method", default=None)
+        self.scene_threshold = self.parse_number(
+            d, "scene_threshold", default=0.3)
+        self.min_spacing = self.parse_number(d, "min_spacing", default=None)
+        self.max_spacing = self.parse_number(d, "max_spacing", default=None)
 
 
 def _clip_videos(clip_config):
     for data in clip_config.data:
         frames = _get_frames(data, clip_config.parameters)
-        _clip_video(data, frames)
+        _clip_video(data, frames, clip_config.parameters.stream_copy)
 
 
 def _get_frames(data, parameters):
@@ -129,6 +159,13 @@ def _get_frames(data, parameters):
         # Get frames from clip series
         series = etae.EventSeries.from_json(data.event_series_path)
         frames = series.to_str()
+    elif parameters.sample_method:
+        # Adaptively sampled frames
+        frames = etav.adaptively_sample_frames(
+            data.input_path, method=parameters.sample_method,
+            scene_threshold=parameters.scene_threshold,
+            min_spacing=parameters.min_spacing,
+            max_spacing=parameters.max_spacing).to_str()
     else:
         # Manually specified frames
         frames = parameters.frames
@@ -136,7 +173,7 @@ def _get_frames(data, parameters):
     return frames
 
 
-def _clip_video(data, frames):
+def _clip_video(data, frames, stream_copy):
     logger.info("Generating video clips for '%s'", data.input_path)
 
     # Collect output paths
@@ -146,14 +183,49 @@ def _clip_video(data, frames):
         out_images_path = data.output_frames_path
     out_clips_path = data.output_video_clips_path
 
+    if out_clips_path and stream_copy:
+        frames = _extract_clips(data.input_path, frames, out_clips_path)
+        if not frames:
+            return
+
     # Sample clips
     with etav.VideoProcessor(
             data.input_path, frames=frames, out_images_path=out_images_path,
-            out_clips_path=out_clips_path) as p:
+            out_clips_path=out_clips_path, out_use_segment_muxer=True) as p:
         for img in p:
             p.write(img)
 
 
+def _extract_clips(input_path, frames, out_clips_path):
+    # Extracts the clips via stream copy and returns a frames string that
+    # describes the clips that must be re-encoded instead, if any
+    try:
+        frame_index = etav.FrameIndex.build_for(input_path)
+    except etav.FrameIndexError as e:
+        logger.warning(
+            "Unable to generate clips via stream copy; re-encoding them "
+            "instead: %s", e)
+        return frames
+
+    if frames is None or frames == "*":
+        frames = "1-%d" % frame_index.num_frames
+
+    failed = []
+    for first, last in etav.FrameRanges.from_str(frames).ranges:
+        try:
+            etav.extract_clip(
+                input_path, out_clips_path % (first, last), first, last,
+                frame_index=frame_index)
+        except (etav.FrameRangeError, etau.ExecutableRuntimeError) as e:
+            # The re-encoded clip will overwrite any partial output
+            logger.warning(
+                "Unable to generate clip %d-%d via stream copy; re-encoding "
+                "it instead: %s", first, last, e)
+            failed.append("%d-%d" % (first, last))
+
+    return ",".join(failed)
+
+
 def run(config_path, pipeline_config_path=None):
     '''Run the clip_videos module.
 
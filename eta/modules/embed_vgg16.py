@@ -78,6 +78,9 @@ class ParametersConfig(Config):
     Parameters:
         crop_box (eta.core.types.Object): [None] A region of interest of
             each frame to extract before embedding
+        reuse_threshold (eta.core.types.Number): [None] An optional mean
+            absolute grayscale difference below which a frame reuses the
+            embedding of the last embedded frame rather than being embedded
     '''
 
     def __init__(self, d):
@@ -85,6 +88,8 @@ class ParametersConfig(Config):
                 d, "vgg16", etav.VGG16Config, default=None)
         self.crop_box = self.parse_object(
                 d, "crop_box", RectangleConfig, default=None)
+        self.reuse_threshold = self.parse_number(
+                d, "reuse_threshold", default=None)
 
 
 class Point2Config(Config):
@@ -131,7 +136,11 @@ def _featurize_driver(config, d):
         vffcd = {
             "backing_path": data.backing_path,
             "frame_featurizer": vffcd_,
+            "reuse_threshold": parameters.reuse_threshold,
         }
+        if parameters.crop_box is None:
+            # Let ffmpeg resize the frames to the size that VGG-16 expects
+            vffcd["frame_size"] = [224, 224]
 
         vffc = etaf.VideoFramesFeaturizerConfig(vffcd)
         vf = etaf.VideoFramesFeaturizer(vffc)
@@ -24,9 +24,11 @@ from builtins import *
 # pragma pylint: enable=wildcard-import
 
 import logging
+from multiprocessing.pool import ThreadPool
+import os
 import sys
 
-from eta.core.config import Config
+from eta.core.config import Config, ConfigError
 import eta.core.image as etai
 import eta.core.module as etam
 import eta.core.numutils as etan
@@ -131,6 +133,21 @@ class ParametersConfig(Config):
             constraint is applied to them
         ffmpeg_out_opts (eta.core.types.Array): [None] An array of ffmpeg
             output options
+        renditions (eta.core.types.ObjectArray): [None] An array of
+            additional renditions of each output to generate. Each rendition
+            is an object with a non-empty, unique "suffix" to insert before
+            the extension of the output path and its own "fps", "max_fps",
+            "scale", "size", "max_size", and "ffmpeg_out_opts" values, which
+            are not inherited from these parameters. All outputs of an input
+            video are generated from a single decoding of it
+        max_workers (eta.core.types.Number): [1] The maximum number of videos
+            in a zip file to format concurrently
+        max_ffmpeg_threads (eta.core.types.Number): [None] The maximum total
+            number of threads that the concurrent ffmpeg processes may use.
+            Each process is allowed an equal share, which is divided equally
+            among its decoder and the encoders of its outputs. Each of them
+            is allowed at least one thread. By default, ffmpeg chooses its own
+            number of threads
     '''
 
     def __init__(self, d):
@@ -141,31 +158,147 @@ class ParametersConfig(Config):
         self.max_size = self.parse_array(d, "max_size", default=None)
         self.ffmpeg_out_opts = self.parse_array(
             d, "ffmpeg_out_opts", default=None)
+        self.renditions = self.parse_object_array(
+            d, "renditions", RenditionConfig, default=None)
+        self.max_workers = self.parse_number(d, "max_workers", default=1)
+        self.max_ffmpeg_threads = self.parse_number(
+            d, "max_ffmpeg_threads", default=None)
+
+        self._validate()
+
+    def _validate(self):
+        # Each rendition must be written to a distinct path
+        suffixes = [r.suffix for r in self.renditions or []]
+        if not all(suffixes):
+            raise ConfigError("Rendition suffixes must be non-empty")
+        if len(set(suffixes)) != len(suffixes):
+            raise ConfigError(
+                "Rendition suffixes must be unique; found %s" % suffixes)
+
+
+class RenditionConfig(Config):
+    '''Rendition configuration settings.
+
+    Attributes:
+        suffix: the suffix to insert before the extension of the output path
+        fps: the output frame rate
+        max_fps: the maximum frame rate allowed for the output video
+        scale: a numeric scale factor to apply to the input resolution
+        size: a desired output (width, height) of the video
+        max_size: a maximum (width, height) allowed for the video
+        ffmpeg_out_opts: an array of ffmpeg output options
+    '''
+
+    def __init__(self, d):
+        self.suffix = self.parse_string(d, "suffix")
+        self.fps = self.parse_number(d, "fps", default=None)
+        self.max_fps = self.parse_number(d, "max_fps", default=None)
+        self.scale = self.parse_number(d, "scale", default=None)
+        self.size = self.parse_array(d, "size", default=None)
+        self.max_size = self.parse_array(d, "max_size", default=None)
+        self.ffmpeg_out_opts = self.parse_array(
+            d, "ffmpeg_out_opts", default=None)
 
 
 def _format_videos(config):
     parameters = config.parameters
+    threads = _get_ffmpeg_threads(parameters, 1)
     for data in config.data:
         if data.is_zip:
             _process_zip(data.input_zip, data.output_zip, parameters)
         else:
-            _process_video(data.input_path, data.output_path, parameters)
+            _process_video(
+                data.input_path, data.output_path, parameters, threads)
 
 
 def _process_zip(input_zip, output_zip, parameters):
     input_paths = etaz.extract_zip(input_zip)
     output_paths = etaz.make_parallel_files(output_zip, input_paths)
 
-    # Iterate over videos
-    for input_path, output_path in zip(input_paths, output_paths):
-        _process_video(input_path, output_path, parameters)
+    workers = max(1, min(int(parameters.max_workers), len(input_paths)))
+    threads = _get_ffmpeg_threads(parameters, workers)
+    args = [
+        (input_path, output_path, parameters, threads)
+        for input_path, output_path in zip(input_paths, output_paths)]
+
+    # Format videos. The work happens in ffmpeg subprocesses, so threads
+    # suffice to run them concurrently
+    if workers > 1:
+        logger.info(
+            "Formatting %d videos with %d workers", len(args), workers)
+        pool = ThreadPool(workers)
+        try:
+            pool.map(_process_video_star, args, chunksize=1)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    else:
+        for arg in args:
+            _process_video_star(arg)
+
+    # Collect outputs. Videos are already compressed, so they are stored
+    etaz.make_zip(output_zip, store_media=True)
 
-    # Collect outputs
-    etaz.make_zip(output_zip)
 
+def _get_ffmpeg_threads(parameters, workers):
+    # Returns the number of threads that each of the `workers` concurrent
+    # ffmpeg processes may use, or None if there is no cap
+    if parameters.max_ffmpeg_threads is None:
+        return None
+    return max(1, int(parameters.max_ffmpeg_threads) // workers)
 
-def _process_video(input_path, output_path, parameters):
+
+def _process_video_star(args):
+    _process_video(*args)
+
+
+def _process_video(input_path, output_path, parameters, threads=None):
     stream_info = etav.VideoStreamInfo.build_for(input_path)
+
+    renditions = [(output_path, parameters)]
+    for rendition in parameters.renditions or []:
+        root, ext = os.path.splitext(output_path)
+        renditions.append((root + rendition.suffix + ext, rendition))
+
+    outputs = []
+    for rendition_path, rendition in renditions:
+        output = _make_output(
+            input_path, rendition_path, stream_info, rendition)
+        if output is not None:
+            outputs.append(output)
+
+    if not outputs:
+        return
+
+    # Limit the decoder and encoder threads, if requested. The threads of
+    # this video are shared equally by its decoder and its encoders
+    in_opts = None
+    if threads:
+        threads = max(1, threads // (len(outputs) + 1))
+        in_opts = ["-threads", str(threads)]
+        for output in outputs:
+            output["out_opts"] = _limit_threads(
+                output["outpath"], output["out_opts"], threads)
+
+    # Format video
+    logger.info("Formatting video '%s'", input_path)
+    if len(outputs) == 1:
+        output = outputs[0]
+        ffmpeg = etav.FFmpeg(
+            fps=output["fps"], size=output["size"], in_opts=in_opts,
+            out_opts=output["out_opts"])
+        ffmpeg.run(input_path, output["outpath"])
+    else:
+        # Decode the input once for all outputs
+        etav.transcode_renditions(input_path, outputs, in_opts=in_opts)
+
+
+def _make_output(input_path, output_path, stream_info, parameters):
+    # Returns the output description for `etav.transcode_renditions()`, or
+    # None if the output was handled via symlink
     ifps = stream_info.frame_rate
     isize = stream_info.frame_size
 
@@ -203,13 +336,12 @@ def _process_video(input_path, output_path, parameters):
             "computation is required. Just symlinking %s to %s",
             output_path, input_path)
         etau.symlink_file(input_path, output_path)
-        return
+        return None
 
     # ffmpeg requires that height/width be even
     osize = [etan.round_to_even(x) for x in osize]
 
-    # Format video
-    logger.info("Formatting video '%s'", input_path)
+    logger.info("Output '%s':", output_path)
     if not same_fps:
         logger.info("*** resampling at frame rate %s", ofps)
     else:
@@ -218,9 +350,20 @@ def _process_video(input_path, output_path, parameters):
         logger.info("*** resizing to %s", str(osize))
     else:
         osize = None  # omit unused argument
-    ffmpeg = etav.FFmpeg(
-        fps=ofps, size=osize, out_opts=parameters.ffmpeg_out_opts)
-    ffmpeg.run(input_path, output_path)
+
+    return {
+        "outpath": output_path,
+        "fps": ofps,
+        "size": osize,
+        "out_opts": parameters.ffmpeg_out_opts,
+    }
+
+
+def _limit_threads(output_path, out_opts, threads):
+    # Returns the output options that limit the encoder to `threads` threads
+    if out_opts is None and etav.is_supported_video_file(output_path):
+        out_opts = etav.FFmpeg.DEFAULT_VIDEO_OUT_OPTS
+    return (out_opts or []) + ["-threads", str(threads)]
 
 
 def run(config_path, pipeline_config_path=None):
@@ -39,11 +39,15 @@ class VideoStreamInfoConfig(etam.BaseModuleConfig):
 
     Attributes:
         data (DataConfig)
+        parameters (ParametersConfig)
     '''
 
     def __init__(self, d):
         super(VideoStreamInfoConfig, self).__init__(d)
         self.data = self.parse_object_array(d, "data", DataConfig)
+        self.parameters = self.parse_object(
+            d, "parameters", ParametersConfig,
+            default=ParametersConfig.default())
 
 
 class DataConfig(Config):
@@ -61,12 +65,44 @@ class DataConfig(Config):
         self.stream_info = self.parse_string(d, "stream_info")
 
 
+class ParametersConfig(Config):
+    '''Parameter configuration settings.
+
+    Parameters:
+        max_workers (eta.core.types.Number): [None] The maximum number of
+            videos to probe concurrently. By default, the number of CPUs is
+            used
+    '''
+
+    def __init__(self, d):
+        self.max_workers = self.parse_number(d, "max_workers", default=None)
+
+
 def _get_stream_info(stream_info_config):
-    for data_config in stream_info_config.data:
-        logger.info("Reading stream info for %s", data_config.video)
-        vsi = etav.VideoStreamInfo.build_for(data_config.video)
+    data = stream_info_config.data
+    max_workers = stream_info_config.parameters.max_workers
+    if max_workers is not None:
+        max_workers = int(max_workers)
+
+    logger.info("Reading stream info for %d video(s)", len(data))
+    results = etav.get_stream_info_many(
+        [data_config.video for data_config in data], max_workers=max_workers)
+
+    num_errors = 0
+    for data_config, (stream_info, error) in zip(data, results):
+        if error is not None:
+            logger.error(str(error))
+            num_errors += 1
+            continue
+
+        logger.info("Writing stream info for %s", data_config.video)
+        vsi = etav.VideoStreamInfo(stream_info)
         vsi.write_json(data_config.stream_info)
 
+    if num_errors:
+        raise etav.FFprobeError(
+            "Unable to get stream info for %d video(s)" % num_errors)
+
 
 def run(config_path, pipeline_config_path=None):
     '''Run the video_stream_info module.